@@ -0,0 +1,316 @@
+"""
+Comparador de arquivos SPED Fiscal via linha de comando.
+
+Compara um par de arquivos ou dois diretórios inteiros (arquivos casados
+pelo nome ou pelo CNPJ e período do registro 0000), gerando relatórios e um
+resumo consolidado, sem interface gráfica.
+
+Códigos de saída:
+    0   - arquivos idênticos
+    1   - diferenças encontradas
+    2   - erro ao processar algum arquivo
+    130 - operação cancelada pelo usuário
+"""
+
+import argparse
+import csv
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import List, Dict, Tuple, Optional
+from sped_comparator import SpedComparator
+from sped_report import SpedReportGenerator
+from sped_export import SpedDiffExporter
+from sped_cache import SpedParseCache, SpedResultCache
+from sped_layout import FieldComparisonRules
+
+
+EXIT_IDENTICAL = 0
+EXIT_DIFFERENCES = 1
+EXIT_ERROR = 2
+EXIT_CANCELLED = 130
+
+SPED_EXTENSIONS = (".txt", ".sped", ".efd")
+SUMMARY_COLUMNS = ("file1", "file2", "total_differences", "records_added",
+                   "records_removed", "records_modified", "error")
+
+
+def read_header_key(file_path: Path) -> Optional[Tuple[str, str, str]]:
+    """Lê o registro 0000 e retorna (CNPJ/CPF, DT_INI, DT_FIN) do arquivo."""
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as file:
+        for line in file:
+            parts = line.strip().split('|')
+            if len(parts) > 8 and parts[1] == "0000":
+                # |0000|COD_VER|COD_FIN|DT_INI|DT_FIN|NOME|CNPJ|CPF|...
+                return (parts[7] or parts[8], parts[4], parts[5])
+            if line.strip():
+                return None
+    return None
+
+
+def list_sped_files(directory: Path) -> List[Path]:
+    """Lista os arquivos SPED de um diretório, em ordem de nome."""
+    return sorted(path for path in directory.iterdir()
+                  if path.is_file() and path.suffix.lower() in SPED_EXTENSIONS)
+
+
+def match_directories(dir1: Path, dir2: Path, match: str = "name") -> Tuple[List[Tuple[Path, Path]], List[Path]]:
+    """Casa os arquivos de dois diretórios.
+
+    ``match="name"`` casa pelo nome do arquivo; ``match="header"`` casa pelo
+    CNPJ/CPF e período informados no registro 0000. Retorna os pares e a
+    lista de arquivos que ficaram sem par.
+    """
+    files1 = list_sped_files(dir1)
+    files2 = list_sped_files(dir2)
+
+    if match == "name":
+        key_function = lambda path: path.name.lower()
+    else:
+        key_function = read_header_key
+
+    keys2 = {}
+    for path in files2:
+        key = key_function(path)
+        if key is not None:
+            keys2.setdefault(key, path)
+
+    pairs = []
+    unmatched = []
+    matched2 = set()
+    for path in files1:
+        key = key_function(path)
+        other = keys2.get(key) if key is not None else None
+        if other is None or other in matched2:
+            unmatched.append(path)
+        else:
+            pairs.append((path, other))
+            matched2.add(other)
+
+    unmatched.extend(path for path in files2 if path not in matched2)
+    return pairs, unmatched
+
+
+def compare_pair(job: tuple) -> Dict:
+    """Compara um par de arquivos e grava os relatórios pedidos.
+
+    Função de módulo para poder ser executada em processos separados. O
+    paralelismo fica no pool de pares: cada par é comparado com um único
+    processo, sem abrir outro pool dentro de cada processo do pool.
+    Retorna o resumo da comparação (ou o erro ocorrido).
+    """
+    file1, file2, output_dir, formats, backend, use_cache, rules = job
+    result = {"file1": str(file1), "file2": str(file2), "error": ""}
+
+    try:
+        cache = SpedParseCache() if use_cache and backend == "mmap" else None
+        result_cache = SpedResultCache() if use_cache else None
+        comparator = SpedComparator(str(file1), str(file2), backend=backend, cache=cache, workers=1,
+                                    result_cache=result_cache, rules=rules)
+
+        if output_dir is None or not formats:
+            for _ in comparator.iter_differences():
+                pass
+        else:
+            comparator.compare()
+            write_reports(comparator, output_dir, formats)
+
+        result.update(comparator.get_summary())
+        comparator.parser1.close()
+        comparator.parser2.close()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    return result
+
+
+def write_reports(comparator: SpedComparator, output_dir: Path, formats: List[str]) -> None:
+    """Grava os relatórios de uma comparação já executada em ``output_dir``."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    base_name = safe_report_name(Path(comparator.file1_path), Path(comparator.file2_path))
+
+    if "html" in formats:
+        SpedReportGenerator(comparator).generate_html_report(str(output_dir / f"{base_name}.html"))
+    if "html-paginado" in formats:
+        SpedReportGenerator(comparator).generate_paginated_html_report(str(output_dir / base_name))
+    for format in ("jsonl", "csv", "parquet"):
+        if format in formats:
+            SpedDiffExporter(comparator).export(str(output_dir / f"{base_name}.{format}"), format)
+
+
+def safe_report_name(file1: Path, file2: Path) -> str:
+    """Nome de arquivo de relatório para um par comparado."""
+    name = file1.stem if file1.name == file2.name else f"{file1.stem}__{file2.stem}"
+    return re.sub(r'[^\w.-]', '_', name)
+
+
+def write_summary(results: List[Dict], output_file: Path) -> None:
+    """Grava o resumo consolidado em CSV."""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def print_summary(results: List[Dict], unmatched: List[Path]) -> None:
+    """Imprime o resumo consolidado no console."""
+    print("\n" + "="*80)
+    print("RESUMO CONSOLIDADO")
+    print("="*80)
+    print(f"{'Arquivo':<40} {'Total':>8} {'Adic.':>8} {'Remov.':>8} {'Modif.':>8}")
+    print("-" * 80)
+
+    for result in results:
+        name = Path(result["file1"]).name[:40]
+        if result["error"]:
+            print(f"{name:<40} ❌ {result['error']}")
+        else:
+            print(f"{name:<40} {result['total_differences']:>8} {result['records_added']:>8} "
+                  f"{result['records_removed']:>8} {result['records_modified']:>8}")
+
+    identical = sum(1 for r in results if not r["error"] and r["total_differences"] == 0)
+    different = sum(1 for r in results if not r["error"] and r["total_differences"] > 0)
+    errors = sum(1 for r in results if r["error"])
+    print("-" * 80)
+    print(f"Pares comparados: {len(results)} | Idênticos: {identical} | "
+          f"Com diferenças: {different} | Erros: {errors}")
+
+    if unmatched:
+        print(f"\n⚠️  Arquivos sem par ({len(unmatched)}):")
+        for path in unmatched:
+            print(f"   {path}")
+
+
+def compare_directories(args) -> int:
+    """Compara dois diretórios em um pool de processos."""
+    pairs, unmatched = match_directories(Path(args.arquivo1), Path(args.arquivo2), args.match)
+    if not pairs:
+        print("❌ Nenhum par de arquivos encontrado para comparar.")
+        return EXIT_ERROR
+
+    output_dir = Path(args.output_dir) if args.output_dir else None
+    rules = build_rules(args)
+    jobs = [(file1, file2, output_dir, args.format, args.backend, args.cache, rules)
+            for file1, file2 in pairs]
+
+    print(f"Comparando {len(pairs)} pares de arquivos com {args.jobs} processos...")
+    results = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(compare_pair, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "❌" if result["error"] else ("✅" if result["total_differences"] == 0 else "🔄")
+            print(f"{status} [{len(results)}/{len(pairs)}] {Path(result['file1']).name}")
+
+    results.sort(key=lambda r: r["file1"])
+    print_summary(results, unmatched)
+
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        write_summary(results, output_dir / "resumo.csv")
+        print(f"\nResumo consolidado gravado em: {output_dir / 'resumo.csv'}")
+
+    return exit_code(results)
+
+
+def compare_files(args) -> int:
+    """Compara um único par de arquivos."""
+    for path in (args.arquivo1, args.arquivo2):
+        if not Path(path).is_file():
+            print(f"❌ Arquivo não encontrado: {path}")
+            return EXIT_ERROR
+
+    cache = SpedParseCache() if args.cache and args.backend == "mmap" else None
+    result_cache = SpedResultCache() if args.cache else None
+    comparator = SpedComparator(args.arquivo1, args.arquivo2, backend=args.backend,
+                                cache=cache, workers=args.jobs, result_cache=result_cache,
+                                rules=build_rules(args))
+    report = SpedReportGenerator(comparator)
+
+    if args.verbose or args.html or args.html_paginado or (args.output_dir and args.format):
+        comparator.compare()
+        report.generate_console_report()
+    else:
+        report.generate_streaming_console_report()
+
+    if args.html:
+        report.generate_html_report(args.html)
+    if args.html_paginado:
+        report.generate_paginated_html_report(args.html_paginado, args.page_size)
+    if args.output_dir and args.format:
+        write_reports(comparator, Path(args.output_dir), args.format)
+
+    summary = comparator.get_summary()
+    return EXIT_DIFFERENCES if summary['total_differences'] > 0 else EXIT_IDENTICAL
+
+
+def build_rules(args) -> Optional[FieldComparisonRules]:
+    """Regras de comparação campo a campo a partir dos argumentos."""
+    if not args.ignore_field and args.tolerance is None:
+        return None
+    return FieldComparisonRules(numeric=args.tolerance is not None,
+                                numeric_tolerance=args.tolerance or 0.0,
+                                ignored_fields=tuple(args.ignore_field))
+
+
+def exit_code(results: List[Dict]) -> int:
+    """Código de saída a partir dos resultados das comparações."""
+    if any(result["error"] for result in results):
+        return EXIT_ERROR
+    if any(result["total_differences"] > 0 for result in results):
+        return EXIT_DIFFERENCES
+    return EXIT_IDENTICAL
+
+
+def build_argument_parser() -> argparse.ArgumentParser:
+    """Argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Compara arquivos SPED Fiscal (pares de arquivos ou diretórios inteiros)."
+    )
+    parser.add_argument("arquivo1", help="Primeiro arquivo SPED ou diretório")
+    parser.add_argument("arquivo2", help="Segundo arquivo SPED ou diretório")
+    parser.add_argument("--html", help="Gera relatório HTML (comparação de um par)")
+    parser.add_argument("--html-paginado", metavar="DIRETORIO",
+                        help="Gera relatório HTML paginado neste diretório (comparação de um par)")
+    parser.add_argument("--page-size", type=int, default=1000,
+                        help="Diferenças por página do relatório HTML paginado (padrão: 1000)")
+    parser.add_argument("--verbose", action="store_true", help="Mostra o relatório completo no console")
+    parser.add_argument("--output-dir", help="Diretório para os relatórios e o resumo consolidado")
+    parser.add_argument("--format", nargs="+", choices=("html", "html-paginado", "jsonl", "csv", "parquet"),
+                        default=[],
+                        help="Formatos dos relatórios gravados em --output-dir")
+    parser.add_argument("--match", choices=("name", "header"), default="name",
+                        help="Como casar arquivos de diretórios: pelo nome ou pelo CNPJ/período do registro 0000")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Número de processos (padrão: número de CPUs)")
+    parser.add_argument("--backend", choices=("memory", "mmap", "columnar"), default="mmap",
+                        help="Backend de parsing (padrão: mmap)")
+    parser.add_argument("--ignore-field", nargs="+", default=[], metavar="CAMPO",
+                        help="Campos ignorados na comparação (ex.: DT_E_S ou C100.DT_E_S)")
+    parser.add_argument("--tolerance", type=float,
+                        help="Compara campos numéricos do leiaute com esta tolerância absoluta")
+    parser.add_argument("--cache", action="store_true", help="Usa o cache em disco do parsing (backend mmap) e dos resultados por bloco")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Ponto de entrada da linha de comando."""
+    args = build_argument_parser().parse_args(argv)
+
+    print("🔍 COMPARADOR DE ARQUIVOS SPED FISCAL")
+    print("=" * 50)
+
+    try:
+        if Path(args.arquivo1).is_dir() and Path(args.arquivo2).is_dir():
+            return compare_directories(args)
+        return compare_files(args)
+    except KeyboardInterrupt:
+        print("\n⚠️  Operação cancelada pelo usuário.")
+        return EXIT_CANCELLED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
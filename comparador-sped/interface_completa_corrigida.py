@@ -8,18 +8,37 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from pathlib import Path
 import threading
+import time
 import webbrowser
 from datetime import datetime
-import os
 
-from sped_parser import SpedParser
+from sped_parser import SpedOperationCancelled
 from sped_comparator import SpedComparator, DifferenceType
 from sped_report import SpedReportGenerator
+from sped_cache import SpedParseCache, SpedResultCache
 
 
 class SpedComparatorGUIFixed:
     """Interface gráfica corrigida para o comparador SPED."""
     
+    # A lista de diferenças é paginada: apenas as linhas da página atual
+    # ficam no treeview, mantendo a interface responsiva com muitos resultados.
+    DETAILS_PAGE_SIZE = 500
+    DIFFERENCE_LABELS = {
+        DifferenceType.RECORD_ADDED: "➕ Adicionado",
+        DifferenceType.RECORD_REMOVED: "➖ Removido",
+        DifferenceType.RECORD_MODIFIED: "🔄 Modificado",
+    }
+    ALL_FILTER = "Todos"
+    PROGRESS_POLL_MS = 200
+    # Intervalo mínimo entre atualizações da lista de resultados parciais
+    PARTIAL_RESULTS_INTERVAL_S = 1.0
+    STAGE_LABELS = {
+        "arquivo1": "Lendo arquivo 1",
+        "arquivo2": "Lendo arquivo 2",
+        "comparacao": "Comparando registros",
+    }
+    
     def __init__(self):
         self.root = tk.Tk()
         self.root.title("Comparador SPED Fiscal - Interface Completa")
@@ -31,7 +50,26 @@ class SpedComparatorGUIFixed:
         self.arquivo2_path = tk.StringVar()
         self.gerar_html = tk.BooleanVar(value=True)
         self.html_path = tk.StringVar(value="relatorio_sped_completo.html")
+        self.html_paginado = tk.BooleanVar(value=False)
+        self.usar_cache = tk.BooleanVar(value=False)
         self.comparator = None
+        self.parse_cache = SpedParseCache()
+        self.result_cache = SpedResultCache()
+        
+        # Índice e paginação da lista de diferenças
+        self.filter_record_type = tk.StringVar(value=self.ALL_FILTER)
+        self.filter_difference_type = tk.StringVar(value=self.ALL_FILTER)
+        self.details_index = {}
+        self.details_positions = []
+        self.details_page = 0
+        self.indexed_count = 0
+        
+        # Progresso e cancelamento (atualizados pela thread de comparação)
+        self.cancel_event = threading.Event()
+        self.running = False
+        self.progress_state = None
+        self.stage_started = None
+        self.partial_results_shown_at = 0.0
         
         # Criar interface
         self.create_interface()
@@ -101,6 +139,13 @@ class SpedComparatorGUIFixed:
         
         ttk.Checkbutton(options_frame, text="📝 Gerar relatório HTML automático", 
                        variable=self.gerar_html).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(options_frame, text="📑 HTML paginado (índice + páginas por tipo de registro, "
+                       "em uma pasta com o nome do arquivo)",
+                       variable=self.html_paginado).pack(anchor=tk.W, pady=5)
+        ttk.Checkbutton(options_frame, text="💾 Guardar o parsing e os resultados em cache para acelerar novas "
+                       f"comparações (em {self.parse_cache.cache_dir}, até "
+                       f"{self.parse_cache.max_bytes // (1024 * 1024)} MB)",
+                       variable=self.usar_cache).pack(anchor=tk.W, pady=5)
         
         html_frame = ttk.Frame(options_frame)
         html_frame.pack(fill=tk.X, pady=(5, 0))
@@ -134,6 +179,9 @@ class SpedComparatorGUIFixed:
         secondary_frame = ttk.Frame(action_frame)
         secondary_frame.pack()
         
+        self.cancel_button = ttk.Button(secondary_frame, text="⛔ Cancelar",
+                                        command=self.cancel_comparison, state='disabled')
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(secondary_frame, text="🗑️ Limpar Campos", 
                   command=self.clear_all).pack(side=tk.LEFT, padx=5)
         ttk.Button(secondary_frame, text="❓ Ajuda", 
@@ -166,7 +214,7 @@ class SpedComparatorGUIFixed:
                                      font=('Arial', 10))
         self.status_label.pack(side=tk.LEFT)
         
-        self.progress_bar = ttk.Progressbar(status_frame, mode='indeterminate', length=200)
+        self.progress_bar = ttk.Progressbar(status_frame, mode='determinate', length=200, maximum=100)
         self.progress_bar.pack(side=tk.RIGHT, padx=(10, 0))
         
     def create_summary_tab(self):
@@ -210,6 +258,28 @@ class SpedComparatorGUIFixed:
         top_frame = ttk.LabelFrame(paned_window, text="Lista de Diferenças", padding="5")
         paned_window.add(top_frame, weight=1)
         
+        # Filtros e navegação entre páginas
+        filter_frame = ttk.Frame(top_frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 5))
+        
+        ttk.Label(filter_frame, text="Registro:").pack(side=tk.LEFT)
+        self.record_type_combo = ttk.Combobox(filter_frame, textvariable=self.filter_record_type,
+                                              values=[self.ALL_FILTER], width=8, state='readonly')
+        self.record_type_combo.pack(side=tk.LEFT, padx=(5, 10))
+        self.record_type_combo.bind('<<ComboboxSelected>>', self.apply_details_filter)
+        
+        ttk.Label(filter_frame, text="Tipo:").pack(side=tk.LEFT)
+        difference_combo = ttk.Combobox(filter_frame, textvariable=self.filter_difference_type,
+                                        values=[self.ALL_FILTER] + list(self.DIFFERENCE_LABELS.values()),
+                                        width=14, state='readonly')
+        difference_combo.pack(side=tk.LEFT, padx=(5, 10))
+        difference_combo.bind('<<ComboboxSelected>>', self.apply_details_filter)
+        
+        ttk.Button(filter_frame, text="▶", width=3, command=self.next_details_page).pack(side=tk.RIGHT)
+        self.page_label = ttk.Label(filter_frame, text="")
+        self.page_label.pack(side=tk.RIGHT, padx=5)
+        ttk.Button(filter_frame, text="◀", width=3, command=self.previous_details_page).pack(side=tk.RIGHT)
+        
         # Treeview para diferenças (mais compacto)
         columns = ('Tipo', 'Registro', 'Linha1', 'Linha2', 'Campos')
         self.details_tree = ttk.Treeview(top_frame, columns=columns, show='headings', height=8)
@@ -234,12 +304,12 @@ class SpedComparatorGUIFixed:
         self.details_tree.configure(yscrollcommand=tree_v_scroll.set, xscrollcommand=tree_h_scroll.set)
         
         # Layout do treeview
-        self.details_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        tree_v_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
-        tree_h_scroll.grid(row=1, column=0, sticky=(tk.W, tk.E))
+        self.details_tree.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        tree_v_scroll.grid(row=1, column=1, sticky=(tk.N, tk.S))
+        tree_h_scroll.grid(row=2, column=0, sticky=(tk.W, tk.E))
         
         top_frame.columnconfigure(0, weight=1)
-        top_frame.rowconfigure(0, weight=1)
+        top_frame.rowconfigure(1, weight=1)
         
         # Frame inferior: Detalhes da diferença selecionada
         bottom_frame = ttk.LabelFrame(paned_window, text="Detalhes da Diferença Selecionada", padding="5")
@@ -453,7 +523,7 @@ class SpedComparatorGUIFixed:
                 text += f"\n\n📊 RESUMO DAS {len(difference.field_differences)} DIFERENÇAS:\n"
                 text += "-" * 40 + "\n"
                 for field_diff in difference.field_differences:
-                    text += f"• Campo {field_diff.field_index}: "
+                    text += f"• Campo {field_diff.field_index} ({field_diff.field_name}): "
                     text += f"'{field_diff.old_value}' → '{field_diff.new_value}'\n"
         
         text += f"\n\n💡 Dica: Este é o registro SPED tipo '{difference.record_type}'\n"
@@ -484,15 +554,21 @@ class SpedComparatorGUIFixed:
         if arquivo:
             self.html_path.set(arquivo)
             
+    def html_report_path(self) -> Path:
+        """Página do relatório HTML: o próprio arquivo ou, no modo paginado, o índice da pasta."""
+        html_path = Path(self.html_path.get())
+        if self.html_paginado.get():
+            return html_path.with_suffix("") / "index.html"
+        return html_path
+            
     def clear_all(self):
         """Limpa todos os campos."""
         self.arquivo1_path.set("")
         self.arquivo2_path.set("")
         self.summary_text.delete(1.0, tk.END)
         
-        # Limpar treeview
-        for item in self.details_tree.get_children():
-            self.details_tree.delete(item)
+        # Limpar treeview e índice das diferenças
+        self.reset_details()
             
         self.status_label.config(text="🗑️ Campos limpos - Pronto para nova comparação")
         
@@ -535,40 +611,182 @@ class SpedComparatorGUIFixed:
         if not self.validate_inputs():
             return
             
+        # Liberar os resultados anteriores
+        self.release_comparator()
+        self.reset_details()
+        
         # Desabilitar botão e mostrar progresso
         self.compare_button.config(state='disabled', text="⏳ Processando...", bg='#FFA500')
-        self.progress_bar.start(10)
+        self.cancel_button.config(state='normal')
+        self.progress_bar.config(value=0)
         self.status_label.config(text="🔄 Executando comparação... Aguarde.")
         
+        self.cancel_event.clear()
+        self.progress_state = None
+        self.partial_results_shown_at = 0.0
+        self.running = True
+        
         # Executar em thread separada
         thread = threading.Thread(target=self.perform_comparison, daemon=True)
         thread.start()
+        self.root.after(self.PROGRESS_POLL_MS, self.poll_progress)
         
     def perform_comparison(self):
         """Executa a comparação real."""
         try:
-            # Criar comparador
-            self.comparator = SpedComparator(self.arquivo1_path.get(), self.arquivo2_path.get())
+            # Criar comparador (o cache em disco só é usado se a opção estiver marcada)
+            usar_cache = self.usar_cache.get()
+            self.comparator = SpedComparator(self.arquivo1_path.get(), self.arquivo2_path.get(),
+                                             backend="mmap",
+                                             cache=self.parse_cache if usar_cache else None,
+                                             progress=self.on_progress,
+                                             result_cache=self.result_cache if usar_cache else None)
             
             # Executar comparação
             differences = self.comparator.compare()
             
             # Gerar HTML se solicitado
             if self.gerar_html.get():
-                report_generator = SpedReportGenerator(self.comparator)
-                report_generator.generate_html_report(self.html_path.get())
+                self.on_progress("relatorio", 0, 0)
+                report_generator = SpedReportGenerator(
+                    self.comparator, progress=lambda written, total: self.on_progress("relatorio", written, total))
+                if self.html_paginado.get():
+                    report_generator.generate_paginated_html_report(str(self.html_report_path().parent))
+                else:
+                    report_generator.generate_html_report(self.html_path.get())
             
             # Atualizar interface
             self.root.after(0, self.comparison_completed, differences)
             
+        except SpedOperationCancelled:
+            self.root.after(0, self.comparison_cancelled)
         except Exception as e:
             self.root.after(0, self.comparison_error, str(e))
             
+    def on_progress(self, stage, processed, total):
+        """Callback de progresso, chamado na thread de comparação.
+        
+        Apenas guarda o estado (a interface é atualizada por ``poll_progress``)
+        e interrompe a comparação se o usuário pediu o cancelamento.
+        """
+        if self.cancel_event.is_set():
+            raise SpedOperationCancelled()
+            
+        now = time.monotonic()
+        if self.progress_state is None or self.progress_state[0] != stage:
+            self.stage_started = now
+        self.progress_state = (stage, processed, total, now)
+        
+    def poll_progress(self):
+        """Atualiza periodicamente progresso, velocidade, tempo restante e resultados parciais.
+        
+        O progresso é atualizado a cada ``PROGRESS_POLL_MS``; a lista de
+        diferenças, no máximo a cada ``PARTIAL_RESULTS_INTERVAL_S`` segundos.
+        """
+        if not self.running:
+            return
+            
+        state = self.progress_state
+        if state is not None and not self.cancel_event.is_set():
+            stage, processed, total, timestamp = state
+            text = f"🔄 {self.STAGE_LABELS.get(stage, 'Gerando relatório HTML')}"
+            
+            if total:
+                self.progress_bar.config(value=100 * processed / total)
+                text += f": {100 * processed / total:.0f}%"
+                
+                elapsed = timestamp - self.stage_started
+                if processed and elapsed > 0:
+                    rate = processed / elapsed
+                    if stage == "comparacao":
+                        text += f" ({rate:,.0f} registros/s"
+                    elif stage == "relatorio":
+                        text += f" ({rate:,.0f} diferenças/s"
+                    else:
+                        text += f" ({rate / 1024 / 1024:.1f} MB/s"
+                    text += f", restam ~{(total - processed) / rate:.0f} s)"
+                    
+            if self.comparator is not None and self.comparator.differences:
+                text += f" | {len(self.comparator.differences)} diferenças até agora"
+                
+            self.status_label.config(text=text)
+            
+            # A lista de diferenças é atualizada com menos frequência que o progresso
+            now = time.monotonic()
+            if now - self.partial_results_shown_at >= self.PARTIAL_RESULTS_INTERVAL_S:
+                self.partial_results_shown_at = now
+                self.show_partial_results()
+            
+        self.root.after(self.PROGRESS_POLL_MS, self.poll_progress)
+        
+    def show_partial_results(self):
+        """Indexa e mostra as diferenças já encontradas durante a comparação.
+        
+        As novas diferenças só são inseridas no treeview se caírem na página
+        visível, depois das linhas já mostradas: a seleção e a rolagem do
+        usuário são mantidas. Nos demais casos só o rótulo da página muda.
+        """
+        if self.comparator is None or len(self.comparator.differences) == self.indexed_count:
+            return
+            
+        start = self.indexed_count
+        self.build_details_index(start)
+        
+        shown = len(self.details_positions)
+        self.extend_details_positions(start)
+        
+        page_start = self.details_page * self.DETAILS_PAGE_SIZE
+        page_end = page_start + self.DETAILS_PAGE_SIZE
+        for index in self.details_positions[max(shown, page_start):page_end]:
+            diff = self.comparator.differences[index]
+            self.details_tree.insert('', tk.END, values=self.format_difference_row(diff), tags=(str(index),))
+        self.update_page_label()
+        
+    def cancel_comparison(self):
+        """Pede o cancelamento da comparação em andamento."""
+        if self.running:
+            self.cancel_event.set()
+            self.cancel_button.config(state='disabled')
+            self.status_label.config(text="⛔ Cancelando comparação...")
+            
+    def comparison_cancelled(self):
+        """Comparação interrompida pelo usuário: libera a memória e restaura a interface."""
+        self.running = False
+        self.release_comparator()
+        self.reset_details()
+        
+        self.compare_button.config(state='normal', text="🔄 COMPARAR ARQUIVOS SPED", bg='#4CAF50')
+        self.cancel_button.config(state='disabled')
+        self.progress_bar.config(value=0)
+        self.status_label.config(text="⛔ Comparação cancelada pelo usuário")
+        
+    def release_comparator(self):
+        """Fecha os arquivos mapeados e descarta os resultados da comparação."""
+        if self.comparator is not None:
+            self.comparator.parser1.close()
+            self.comparator.parser2.close()
+            self.comparator = None
+            
+    def reset_details(self):
+        """Limpa a lista de diferenças, o índice e os filtros."""
+        self.details_tree.delete(*self.details_tree.get_children())
+        self.details_index = {}
+        self.details_positions = []
+        self.details_page = 0
+        self.indexed_count = 0
+        self.filter_record_type.set(self.ALL_FILTER)
+        self.filter_difference_type.set(self.ALL_FILTER)
+        self.record_type_combo.config(values=[self.ALL_FILTER])
+        self.page_label.config(text="")
+            
     def comparison_completed(self, differences):
         """Comparação concluída com sucesso."""
+        self.running = False
+        
         # Reabilitar botão
         self.compare_button.config(state='normal', text="🔄 COMPARAR ARQUIVOS SPED", bg='#4CAF50')
-        self.progress_bar.stop()
+        self.cancel_button.config(state='disabled')
+        self.progress_bar.config(value=100)
         
         # Atualizar resultados
         self.update_results()
@@ -596,12 +814,14 @@ Verifique as abas "Resumo" e "Detalhes" para mais informações."""
         # Perguntar sobre HTML
         if self.gerar_html.get() and messagebox.askyesno("Abrir Relatório", 
                                                           "Deseja abrir o relatório HTML no navegador?"):
-            webbrowser.open(f"file://{Path(self.html_path.get()).absolute()}")
+            webbrowser.open(f"file://{self.html_report_path().absolute()}")
             
     def comparison_error(self, error_msg):
         """Erro na comparação."""
+        self.running = False
         self.compare_button.config(state='normal', text="🔄 COMPARAR ARQUIVOS SPED", bg='#4CAF50')
-        self.progress_bar.stop()
+        self.cancel_button.config(state='disabled')
+        self.progress_bar.config(value=0)
         self.status_label.config(text="❌ Erro na comparação")
         messagebox.showerror("Erro na Comparação", f"❌ Erro durante a comparação:\n\n{error_msg}")
         
@@ -636,57 +856,139 @@ Verifique as abas "Resumo" e "Detalhes" para mais informações."""
             text += "\n💡 Veja a aba 'Detalhes' para informações completas.\n"
             
         if self.gerar_html.get():
-            text += f"\n📝 Relatório HTML gerado em:\n{self.html_path.get()}\n"
+            text += f"\n📝 Relatório HTML gerado em:\n{self.html_report_path()}\n"
             
         self.summary_text.insert(tk.END, text)
         
-        # Atualizar detalhes
-        for item in self.details_tree.get_children():
-            self.details_tree.delete(item)
-            
-        for index, diff in enumerate(self.comparator.differences):
-            tipo_icon = ""
-            if diff.difference_type == DifferenceType.RECORD_ADDED:
-                tipo_icon = "➕ Adicionado"
-            elif diff.difference_type == DifferenceType.RECORD_REMOVED:
-                tipo_icon = "➖ Removido"  
-            elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
-                tipo_icon = "🔄 Modificado"
-                
-            linha1 = str(diff.line_number_file1) if diff.line_number_file1 else "-"
-            linha2 = str(diff.line_number_file2) if diff.line_number_file2 else "-"
-            
-            # Informação mais detalhada sobre campos
-            if diff.difference_type == DifferenceType.RECORD_MODIFIED and diff.field_differences:
-                campo_info = f"{len(diff.field_differences)} campo"
-                if len(diff.field_differences) > 1:
-                    campo_info += "s"
-                
-                # Listar os primeiros campos alterados
-                campos_alterados = []
-                for field_diff in diff.field_differences[:3]:  # Mostrar até 3 campos
-                    campos_alterados.append(f"C{field_diff.field_index}")
-                
-                if len(diff.field_differences) > 3:
-                    campo_info += f" ({', '.join(campos_alterados)}...)"
-                else:
-                    campo_info += f" ({', '.join(campos_alterados)})" if campos_alterados else ""
-                    
-            elif diff.difference_type == DifferenceType.RECORD_ADDED:
-                campo_info = f"Novo ({len(diff.record_file2.fields)} campos)"
-            elif diff.difference_type == DifferenceType.RECORD_REMOVED:
-                campo_info = f"Removido ({len(diff.record_file1.fields)} campos)"
-            else:
-                campo_info = "N/A"
-                
-            # Inserir com tag contendo o índice
-            self.details_tree.insert('', tk.END, values=(
-                tipo_icon, diff.record_type, linha1, linha2, campo_info
-            ), tags=(str(index),))
+        # Atualizar detalhes (completa o índice e a página montados durante a comparação)
+        self.show_partial_results()
+        self.update_page_label()
         
         # Atualizar comparação visual
         self.update_visual_comparison()
         
+    def build_details_index(self, start=0):
+        """Indexa as diferenças por (tipo de registro, tipo de diferença).
+        
+        Com ``start`` apenas as diferenças a partir dessa posição são
+        acrescentadas ao índice (resultados parciais da comparação).
+        """
+        if start == 0:
+            self.details_index = {}
+            
+        differences = self.comparator.differences
+        end = len(differences)
+        for index in range(start, end):
+            diff = differences[index]
+            self.details_index.setdefault((diff.record_type, diff.difference_type), []).append(index)
+        self.indexed_count = end
+            
+        record_types = sorted({record_type for record_type, _ in self.details_index})
+        self.record_type_combo.config(values=[self.ALL_FILTER] + record_types)
+        
+    def apply_details_filter(self, event=None, page=0):
+        """Aplica os filtros de registro e tipo de diferença usando o índice."""
+        if not self.comparator:
+            return
+            
+        record_type = self.filter_record_type.get()
+        difference_label = self.filter_difference_type.get()
+        
+        if record_type == self.ALL_FILTER and difference_label == self.ALL_FILTER:
+            self.details_positions = range(self.indexed_count)
+        else:
+            positions = []
+            for (key_type, key_difference), indexes in self.details_index.items():
+                if record_type != self.ALL_FILTER and key_type != record_type:
+                    continue
+                if difference_label != self.ALL_FILTER and self.DIFFERENCE_LABELS.get(key_difference) != difference_label:
+                    continue
+                positions.extend(indexes)
+            # As listas do índice já estão ordenadas; a ordenação apenas as intercala
+            positions.sort()
+            self.details_positions = positions
+            
+        self.show_details_page(page)
+        
+    def extend_details_positions(self, start):
+        """Acrescenta à lista filtrada as diferenças indexadas a partir de ``start``."""
+        record_type = self.filter_record_type.get()
+        difference_label = self.filter_difference_type.get()
+        
+        if record_type == self.ALL_FILTER and difference_label == self.ALL_FILTER:
+            self.details_positions = range(self.indexed_count)
+            return
+            
+        differences = self.comparator.differences
+        for index in range(start, self.indexed_count):
+            diff = differences[index]
+            if record_type != self.ALL_FILTER and diff.record_type != record_type:
+                continue
+            if difference_label != self.ALL_FILTER and self.DIFFERENCE_LABELS.get(diff.difference_type) != difference_label:
+                continue
+            self.details_positions.append(index)
+        
+    def show_details_page(self, page):
+        """Mostra no treeview apenas as diferenças da página informada."""
+        page_count = max(1, -(-len(self.details_positions) // self.DETAILS_PAGE_SIZE))
+        self.details_page = min(max(page, 0), page_count - 1)
+        
+        self.details_tree.delete(*self.details_tree.get_children())
+        
+        start = self.details_page * self.DETAILS_PAGE_SIZE
+        for index in self.details_positions[start:start + self.DETAILS_PAGE_SIZE]:
+            diff = self.comparator.differences[index]
+            # Inserir com tag contendo o índice
+            self.details_tree.insert('', tk.END, values=self.format_difference_row(diff), tags=(str(index),))
+            
+        self.update_page_label()
+        
+    def update_page_label(self):
+        """Atualiza o rótulo com a página atual e o total de diferenças filtradas."""
+        page_count = max(1, -(-len(self.details_positions) // self.DETAILS_PAGE_SIZE))
+        self.page_label.config(text=f"Página {self.details_page + 1} de {page_count} "
+                                    f"({len(self.details_positions)} diferenças)")
+        
+    def previous_details_page(self):
+        """Volta para a página anterior da lista de diferenças."""
+        self.show_details_page(self.details_page - 1)
+        
+    def next_details_page(self):
+        """Avança para a próxima página da lista de diferenças."""
+        self.show_details_page(self.details_page + 1)
+        
+    def format_difference_row(self, diff):
+        """Valores de uma linha do treeview de diferenças."""
+        tipo_icon = self.DIFFERENCE_LABELS.get(diff.difference_type, "")
+            
+        linha1 = str(diff.line_number_file1) if diff.line_number_file1 else "-"
+        linha2 = str(diff.line_number_file2) if diff.line_number_file2 else "-"
+        
+        # Informação mais detalhada sobre campos
+        if diff.difference_type == DifferenceType.RECORD_MODIFIED and diff.field_differences:
+            campo_info = f"{len(diff.field_differences)} campo"
+            if len(diff.field_differences) > 1:
+                campo_info += "s"
+            
+            # Listar os primeiros campos alterados
+            campos_alterados = []
+            for field_diff in diff.field_differences[:3]:  # Mostrar até 3 campos
+                campos_alterados.append(field_diff.field_name)
+            
+            if len(diff.field_differences) > 3:
+                campo_info += f" ({', '.join(campos_alterados)}...)"
+            else:
+                campo_info += f" ({', '.join(campos_alterados)})" if campos_alterados else ""
+                
+        elif diff.difference_type == DifferenceType.RECORD_ADDED:
+            campo_info = f"Novo ({len(diff.record_file2.fields)} campos)"
+        elif diff.difference_type == DifferenceType.RECORD_REMOVED:
+            campo_info = f"Removido ({len(diff.record_file1.fields)} campos)"
+        else:
+            campo_info = "N/A"
+            
+        return (tipo_icon, diff.record_type, linha1, linha2, campo_info)
+        
     def update_visual_comparison(self, filter_record=None):
         """Atualiza a aba de comparação visual."""
         if not self.comparator:
@@ -724,14 +1026,16 @@ Verifique as abas "Resumo" e "Detalhes" para mais informações."""
             self.visual_text2.insert(tk.END, f"❌ Nenhum registro tipo '{filter_record}' encontrado no arquivo 2\n")
             return
             
-        # Mostrar registros do tipo filtrado
+        # Mostrar registros do tipo filtrado (linhas lidas direto do arquivo mapeado)
         self.visual_text1.insert(tk.END, f"🔍 REGISTROS TIPO '{filter_record}' - ARQUIVO 1:\n\n")
-        for record in records1:
-            self.visual_text1.insert(tk.END, f"Linha {record.line_number}: {record.raw_line}\n")
+        lines1 = self.comparator.parser1.iter_raw_lines(filter_record)
+        self.visual_text1.insert(tk.END, "".join(f"Linha {line_number}: {raw_line}\n"
+                                                 for line_number, raw_line in lines1))
             
         self.visual_text2.insert(tk.END, f"🔍 REGISTROS TIPO '{filter_record}' - ARQUIVO 2:\n\n")
-        for record in records2:
-            self.visual_text2.insert(tk.END, f"Linha {record.line_number}: {record.raw_line}\n")
+        lines2 = self.comparator.parser2.iter_raw_lines(filter_record)
+        self.visual_text2.insert(tk.END, "".join(f"Linha {line_number}: {raw_line}\n"
+                                                 for line_number, raw_line in lines2))
             
     def show_all_differences(self):
         """Mostra todas as diferenças na comparação visual."""
@@ -0,0 +1,196 @@
+"""
+Módulo de cache em disco para arquivos SPED já processados.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Optional, IO
+
+from sped_parser import SpedFileIndex
+
+
+class SpedParseCache:
+    """Cache persistente do índice (``SpedFileIndex``) de arquivos SPED.
+    
+    Cada entrada é identificada pelo tamanho e pelo hash do conteúdo do
+    arquivo. Um manifesto associa caminho + tamanho + mtime ao hash, de modo
+    que arquivos inalterados não precisam ser relidos para calcular o hash.
+    As entradas menos usadas recentemente são removidas quando o tamanho total
+    ultrapassa ``max_bytes``.
+    
+    Vários processos podem usar o mesmo diretório: cada gravação usa um
+    arquivo temporário próprio, e uma associação perdida no manifesto (por
+    gravações simultâneas) apenas faz o hash do arquivo ser recalculado.
+    """
+    
+    MANIFEST_NAME = "manifest.json"
+    ENTRY_SUFFIX = ".idx"
+    
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = 1024 * 1024 * 1024):
+        if cache_dir is None:
+            cache_dir = Path.home() / ".cache" / "comparador-sped"
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        
+    def load(self, file_path: Path) -> Optional[SpedFileIndex]:
+        """Retorna o índice em cache do arquivo, ou None se não houver."""
+        entry_path = self._entry_path(self.get_key(file_path))
+        if not entry_path.exists():
+            return None
+            
+        try:
+            with open(entry_path, 'rb') as stream:
+                index = SpedFileIndex.load(file_path, stream)
+        except (OSError, ValueError, EOFError):
+            # Entrada corrompida, incompatível ou removida por outro processo: refazer o parsing
+            entry_path.unlink(missing_ok=True)
+            return None
+        
+        # Marcar a entrada como usada recentemente (LRU pelo mtime)
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+        return index
+    
+    def store(self, file_path: Path, index: SpedFileIndex) -> None:
+        """Grava o índice do arquivo no cache e aplica o limite de tamanho."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_path = self._entry_path(self.get_key(file_path))
+        _write_atomic(entry_path, 'wb', index.dump)
+        
+        self._evict()
+    
+    def get_key(self, file_path: Path) -> str:
+        """Chave do arquivo: tamanho + hash do conteúdo (reaproveitado via mtime)."""
+        stat = os.stat(file_path)
+        stamp = f"{Path(file_path).resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+        
+        key = self._read_manifest().get(stamp)
+        if key is None:
+            key = f"{stat.st_size}-{self._hash_file(file_path)}"
+            # Reler o manifesto após o hash para preservar o que outros processos gravaram
+            manifest = self._read_manifest()
+            manifest[stamp] = key
+            self._write_manifest(manifest)
+            
+        return key
+    
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        for entry_path in self.cache_dir.glob(f"*{self.ENTRY_SUFFIX}"):
+            entry_path.unlink(missing_ok=True)
+        self._write_manifest({})
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.ENTRY_SUFFIX}"
+    
+    def _hash_file(self, file_path: Path) -> str:
+        """Calcula o hash do conteúdo do arquivo em blocos."""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(file_path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _read_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.cache_dir / self.MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_manifest(self, manifest: Dict[str, str]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.cache_dir / self.MANIFEST_NAME, 'w', lambda f: json.dump(manifest, f))
+    
+    def _evict(self) -> None:
+        """Remove as entradas menos usadas até respeitar ``max_bytes``."""
+        entries = []
+        for entry_path in self.cache_dir.glob(f"*{self.ENTRY_SUFFIX}"):
+            try:
+                entries.append((entry_path, entry_path.stat()))
+            except FileNotFoundError:
+                continue  # Removida por outro processo
+        entries.sort(key=lambda entry: entry[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        
+        for entry_path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            total -= stat.st_size
+            entry_path.unlink(missing_ok=True)
+        
+        # Descartar do manifesto as associações para entradas removidas
+        keys = {path.stem for path in self.cache_dir.glob(f"*{self.ENTRY_SUFFIX}")}
+        manifest = self._read_manifest()
+        self._write_manifest({stamp: key for stamp, key in manifest.items() if key in keys})
+
+
+class SpedResultCache:
+    """Cache persistente dos resultados da última comparação de um par de arquivos.
+    
+    Para cada bloco comparado guarda os resumos (digests) do bloco nos dois
+    arquivos e as diferenças encontradas, com os registros identificados pela
+    ordem dentro do bloco. Numa nova comparação do mesmo par, os blocos cujos
+    resumos não mudaram reaproveitam essas diferenças sem serem comparados.
+    A ``signature`` descreve as regras de comparação usadas; resultados
+    obtidos com outras regras são descartados.
+    """
+    
+    FORMAT_VERSION = 1
+    ENTRY_SUFFIX = ".json"
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = Path.home() / ".cache" / "comparador-sped" / "resultados"
+        self.cache_dir = Path(cache_dir)
+        
+    def load(self, file1_path: str, file2_path: str, signature: str = "") -> Optional[Dict]:
+        """Retorna os resultados por bloco da última comparação do par, ou None."""
+        try:
+            with open(self._entry_path(file1_path, file2_path), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+            
+        if data.get("version") != self.FORMAT_VERSION or data.get("signature", "") != signature:
+            return None
+        return data.get("blocks", {})
+    
+    def store(self, file1_path: str, file2_path: str, blocks: Dict, signature: str = "") -> None:
+        """Grava os resultados por bloco da comparação do par."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = {"version": self.FORMAT_VERSION, "signature": signature, "blocks": blocks}
+        _write_atomic(self._entry_path(file1_path, file2_path), 'w',
+                      lambda f: json.dump(data, f, ensure_ascii=False))
+    
+    def clear(self) -> None:
+        """Remove todas as entradas do cache."""
+        for entry_path in self.cache_dir.glob(f"*{self.ENTRY_SUFFIX}"):
+            entry_path.unlink(missing_ok=True)
+    
+    def _entry_path(self, file1_path: str, file2_path: str) -> Path:
+        """Entrada do par, identificada pelos caminhos absolutos dos dois arquivos."""
+        pair = f"{Path(file1_path).resolve()}|{Path(file2_path).resolve()}"
+        key = hashlib.blake2b(pair.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{key}{self.ENTRY_SUFFIX}"
+
+
+def _write_atomic(path: Path, mode: str, write: Callable[[IO], None]) -> None:
+    """Grava ``path`` por um arquivo temporário exclusivo e o substitui de uma vez.
+    
+    O temporário é criado no mesmo diretório com nome único, de modo que
+    processos gravando o mesmo destino não substituem o temporário um do outro.
+    """
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with open(fd, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+            write(f)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
@@ -2,10 +2,14 @@
 Módulo para comparação de arquivos SPED Fiscal.
 """
 
-from typing import List, Dict, Tuple, Set, Optional
+from typing import List, Dict, Optional, Sequence, Iterator, Callable, Iterable
 from dataclasses import dataclass
 from enum import Enum
-from sped_parser import SpedParser, SpedRecord
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from sped_parser import SpedParser, SpedRecord, PROGRESS_INTERVAL, read_records_at
+from sped_layout import (get_key_schema, build_record_key, get_field_name, numbers_equal,
+                         FieldComparisonRules, FieldPlan)
+from sped_diff import align_sequences
 
 
 class DifferenceType(Enum):
@@ -47,146 +51,654 @@ class RecordDifference:
             return f"? Diferença desconhecida em {self.record_type}"
 
 
+def compare_record_fields(record1: SpedRecord, record2: SpedRecord,
+                          plan: Optional[FieldPlan] = None) -> List[FieldDifference]:
+    """Compara os campos entre dois registros.
+    
+    Os campos são nomeados pelo leiaute do registro. Com um ``plan``
+    (``FieldComparisonRules.get_field_plan``) apenas os campos relevantes são
+    comparados, os ignorados são pulados e os numéricos são comparados como
+    números.
+    """
+    differences = []
+    fields1 = record1.fields
+    fields2 = record2.fields
+    
+    # Comparar número de campos
+    if plan is None or plan.indexes is None:
+        indexes = range(max(len(fields1), len(fields2)))
+    else:
+        indexes = plan.indexes
+    
+    for i in indexes:
+        value1 = fields1[i] if i < len(fields1) else ""
+        value2 = fields2[i] if i < len(fields2) else ""
+        
+        if value1 == value2:
+            continue
+        if plan is not None:
+            if i in plan.ignored:
+                continue
+            if i in plan.numeric and numbers_equal(value1, value2, plan.tolerance):
+                continue
+            
+        differences.append(FieldDifference(
+            field_index=i,
+            field_name=get_field_name(record1.record_type, i),
+            old_value=value1,
+            new_value=value2
+        ))
+    
+    return differences
+
+
+def match_records_by_key(records1: Sequence[SpedRecord], keys1: Sequence[str],
+                         records2: Sequence[SpedRecord], keys2: Sequence[str]):
+    """Casa os registros pela chave semântica (junção por hash).
+    
+    Retorna (removidos, adicionados, pares correspondentes).
+    """
+    map1 = dict(zip(keys1, records1))
+    map2 = dict(zip(keys2, records2))
+    
+    removed = [record for key, record in map1.items() if key not in map2]
+    added = [record for key, record in map2.items() if key not in map1]
+    matched = [(record, map2[key]) for key, record in map1.items() if key in map2]
+    return removed, added, matched
+
+
+def align_records(records1: Sequence[SpedRecord], records2: Sequence[SpedRecord]):
+    """Casa registros sem chave natural alinhando as sequências de resumos.
+    
+    Retorna (removidos, adicionados, pares correspondentes).
+    """
+    pairs = align_sequences([record.digest for record in records1],
+                            [record.digest for record in records2])
+    
+    removed = [records1[i] for i, j in pairs if j is None]
+    added = [records2[j] for i, j in pairs if i is None]
+    matched = [(records1[i], records2[j]) for i, j in pairs
+               if i is not None and j is not None]
+    return removed, added, matched
+
+
+def iter_record_type_differences(record_type: str, records1: Sequence[SpedRecord],
+                                 records2: Sequence[SpedRecord],
+                                 keys1: Optional[Sequence[str]] = None,
+                                 keys2: Optional[Sequence[str]] = None,
+                                 rules: Optional[FieldComparisonRules] = None,
+                                 progress: Optional[Callable[[int], None]] = None) -> Iterator[RecordDifference]:
+    """Compara os registros de um tipo, gerando as diferenças à medida que são encontradas.
+    
+    Com chaves, os registros são casados por ``match_records_by_key``; sem
+    chaves, por ``align_records``. Não depende do comparador, podendo ser
+    executada em outro processo.
+    
+    ``progress``, se informado, recebe a cada ``PROGRESS_INTERVAL`` registros
+    a quantidade de registros do tipo (dos dois arquivos) já comparados.
+    """
+    plan = rules.get_field_plan(record_type) if rules is not None else None
+    
+    if keys1 is None or keys2 is None:
+        removed, added, matched = align_records(records1, records2)
+    else:
+        removed, added, matched = match_records_by_key(records1, keys1, records2, keys2)
+    
+    processed = 0
+    
+    def advance(count: int) -> None:
+        nonlocal processed
+        before = processed
+        processed += count
+        if progress is not None and processed // PROGRESS_INTERVAL != before // PROGRESS_INTERVAL:
+            progress(processed)
+    
+    # Registros removidos
+    for record in removed:
+        advance(1)
+        yield RecordDifference(
+            record_type=record_type,
+            difference_type=DifferenceType.RECORD_REMOVED,
+            line_number_file1=record.line_number,
+            line_number_file2=None,
+            record_file1=record,
+            record_file2=None,
+            field_differences=[]
+        )
+    
+    # Registros adicionados
+    for record in added:
+        advance(1)
+        yield RecordDifference(
+            record_type=record_type,
+            difference_type=DifferenceType.RECORD_ADDED,
+            line_number_file1=None,
+            line_number_file2=record.line_number,
+            record_file1=None,
+            record_file2=record,
+            field_differences=[]
+        )
+    
+    # Comparar registros que existem em ambos
+    for record1, record2 in matched:
+        advance(2)
+        
+        # Linhas idênticas (mesmo resumo) dispensam a comparação campo a campo
+        if record1.digest == record2.digest:
+            continue
+        
+        field_diffs = compare_record_fields(record1, record2, plan)
+        
+        if field_diffs:
+            yield RecordDifference(
+                record_type=record_type,
+                difference_type=DifferenceType.RECORD_MODIFIED,
+                line_number_file1=record1.line_number,
+                line_number_file2=record2.line_number,
+                record_file1=record1,
+                record_file2=record2,
+                field_differences=field_diffs
+            )
+
+
+def diff_record_type(record_type: str, records1: Sequence[SpedRecord], records2: Sequence[SpedRecord],
+                     keys1: Optional[Sequence[str]] = None,
+                     keys2: Optional[Sequence[str]] = None,
+                     rules: Optional[FieldComparisonRules] = None) -> List[RecordDifference]:
+    """Compara os registros de um tipo e retorna a lista de diferenças."""
+    return list(iter_record_type_differences(record_type, records1, records2, keys1, keys2, rules))
+
+
+def compute_record_keys(records: Sequence[SpedRecord], parent_keys: Optional[Iterable[str]] = None,
+                        progress: Optional[Callable[[int], None]] = None) -> List[str]:
+    """Calcula as chaves semânticas de registros de um mesmo tipo.
+    
+    ``parent_keys`` traz a chave do pai de cada registro, na mesma ordem,
+    para os esquemas que a incluem. Chaves repetidas recebem o número da
+    ocorrência. ``progress`` recebe periodicamente o número de registros já
+    processados.
+    """
+    keys: List[str] = []
+    if not records:
+        return keys
+        
+    schema = get_key_schema(records[0].record_type)
+    occurrences: Dict[str, int] = {}
+    parent_keys = None if parent_keys is None else iter(parent_keys)
+    
+    for count, record in enumerate(records):
+        if progress is not None and count % PROGRESS_INTERVAL == 0:
+            progress(count)
+        
+        parent_key = None if parent_keys is None else next(parent_keys)
+        key = build_record_key(record.record_type, record.fields, schema, parent_key)
+        
+        occurrence = occurrences.get(key, 0)
+        occurrences[key] = occurrence + 1
+        if occurrence:
+            key = f"{key}#{occurrence}"
+        keys.append(key)
+        
+    return keys
+
+
+def _diff_record_type_job(job: tuple) -> List[RecordDifference]:
+    """Executa ``diff_record_type`` com os argumentos empacotados (uso em processos)."""
+    return diff_record_type(*job)
+
+
+def _diff_record_type_locations_job(job: tuple) -> List[RecordDifference]:
+    """Relê do arquivo os registros de um tipo e os compara (uso em processos).
+    
+    Recebe apenas a localização dos registros (``SpedParser.get_type_locations``)
+    e as chaves dos pais, em vez dos registros já decodificados.
+    """
+    record_type, locations1, locations2, parent_keys1, parent_keys2, rules = job
+    records1 = read_records_at(*locations1)
+    records2 = read_records_at(*locations2)
+    
+    if get_key_schema(record_type) is None:
+        return diff_record_type(record_type, records1, records2, rules=rules)
+    return diff_record_type(record_type, records1, records2, compute_record_keys(records1, parent_keys1),
+                            compute_record_keys(records2, parent_keys2), rules)
+
+
 class SpedComparator:
-    """Comparador de arquivos SPED Fiscal."""
+    """Comparador de arquivos SPED Fiscal.
+    
+    Com ``workers > 1`` os tipos de registro são comparados em paralelo,
+    em processos (``executor="process"``) ou threads (``executor="thread"``);
+    as diferenças são reunidas na mesma ordem da comparação sequencial.
+    
+    O callback ``progress(etapa, processados, total)`` acompanha o parsing de
+    cada arquivo (em bytes, etapas ``"arquivo1"`` e ``"arquivo2"``) e a
+    comparação (em registros, etapa ``"comparacao"``). Se o callback lançar
+    ``SpedOperationCancelled`` a comparação é interrompida.
+    
+    Com um ``result_cache`` (``SpedResultCache``) as diferenças de cada bloco
+    são guardadas junto com os resumos do bloco nos dois arquivos; ao comparar
+    de novo o mesmo par, os blocos que não mudaram desde a última execução
+    reaproveitam o resultado anterior e só os demais são comparados.
     
-    def __init__(self, file1_path: str, file2_path: str):
+    ``rules`` (``FieldComparisonRules``) define a comparação campo a campo:
+    campos ignorados, campos relevantes por registro e tolerância numérica.
+    """
+    
+    EXECUTORS = ("process", "thread")
+    STAGES = ("arquivo1", "arquivo2", "comparacao")
+    
+    def __init__(self, file1_path: str, file2_path: str, backend: str = "memory", cache=None,
+                 workers: int = 1, executor: str = "process",
+                 progress: Optional[Callable[[str, int, int], None]] = None, result_cache=None,
+                 rules: Optional[FieldComparisonRules] = None):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Executor inválido: {executor}")
+            
         self.file1_path = file1_path
         self.file2_path = file2_path
-        self.parser1 = SpedParser(file1_path)
-        self.parser2 = SpedParser(file2_path)
-        self.differences: List[RecordDifference] = []
+        self.progress = progress
+        self.result_cache = result_cache
+        self.rules = rules
+        self.parser1 = SpedParser(file1_path, backend=backend, cache=cache,
+                                  progress=self._stage_progress("arquivo1"))
+        self.parser2 = SpedParser(file2_path, backend=backend, cache=cache,
+                                  progress=self._stage_progress("arquivo2"))
+        self.workers = workers
+        self.executor = executor
+        self._reset_counters()
         
     def compare(self) -> List[RecordDifference]:
         """Executa a comparação completa entre os arquivos."""
+        for difference in self.iter_differences():
+            self.differences.append(difference)
+            self._differences_by_type.setdefault(difference.record_type, []).append(difference)
+        
+        self.compared = True
+        return self.differences
+    
+    def iter_differences(self) -> Iterator[RecordDifference]:
+        """Executa a comparação gerando as diferenças à medida que são encontradas.
+        
+        As diferenças não são acumuladas em ``self.differences`` (que fica
+        vazio, assim como o índice por tipo), o que mantém a memória limitada
+        mesmo com milhões de diferenças.
+        """
+        self._reset_counters()
+        self._parse_files()
+        
+        # Comparar registros, mantendo os contadores atualizados
+        for difference in self._compare_records():
+            self._count_difference(difference)
+            yield difference
+    
+    def _reset_counters(self) -> None:
+        """Zera os contadores, as diferenças e o índice de diferenças por tipo."""
+        # Indica se ``differences`` e o índice por tipo vêm de um ``compare()`` concluído
+        self.compared = False
+        self.differences: List[RecordDifference] = []
+        self._summary = {
+            "total_differences": 0,
+            "records_added": 0,
+            "records_removed": 0,
+            "records_modified": 0
+        }
+        self._counts_by_type: Dict[str, Dict[str, int]] = {}
+        self._differences_by_type: Dict[str, List[RecordDifference]] = {}
+    
+    def _count_difference(self, difference: RecordDifference) -> None:
+        """Atualiza os contadores gerais e por tipo com uma diferença."""
+        counts = self._counts_by_type.get(difference.record_type)
+        if counts is None:
+            counts = self._counts_by_type[difference.record_type] = {
+                'added': 0,
+                'removed': 0,
+                'modified': 0,
+                'total': 0
+            }
+        
+        self._summary["total_differences"] += 1
+        counts['total'] += 1
+        
+        if difference.difference_type == DifferenceType.RECORD_ADDED:
+            self._summary["records_added"] += 1
+            counts['added'] += 1
+        elif difference.difference_type == DifferenceType.RECORD_REMOVED:
+            self._summary["records_removed"] += 1
+            counts['removed'] += 1
+        elif difference.difference_type == DifferenceType.RECORD_MODIFIED:
+            self._summary["records_modified"] += 1
+            counts['modified'] += 1
+    
+    def _parse_files(self) -> None:
+        """Faz o parsing dos dois arquivos."""
         print("Fazendo parsing dos arquivos...")
         self.parser1.parse_file()
         self.parser2.parse_file()
         
         print(f"Arquivo 1: {self.parser1.get_total_records()} registros")
         print(f"Arquivo 2: {self.parser2.get_total_records()} registros")
+    
+    def _stage_progress(self, stage: str) -> Optional[Callable[[int, int], None]]:
+        """Callback de progresso de uma etapa, repassado ao callback do comparador."""
+        if self.progress is None:
+            return None
+        return lambda processed, total: self.progress(stage, processed, total)
+    
+    def _compare_records(self) -> Iterator[RecordDifference]:
+        """Compara registros entre os dois arquivos."""
+        record_types = self._get_types_to_compare()
         
-        # Comparar registros
-        self._compare_records()
+        # Tipos de blocos que não mudaram desde a última comparação do par
+        previous = self._load_previous_results(record_types)
+        types_to_diff = [record_type for record_type in record_types if record_type not in previous]
         
-        return self.differences
+        # O progresso da comparação é medido em registros dos dois arquivos
+        total = sum(self._count_type_records(record_type) for record_type in record_types)
+        processed = 0
+        if self.progress is not None:
+            self.progress("comparacao", 0, total)
+        
+        if self.workers > 1 and len(types_to_diff) > 1:
+            results = self._compare_types_parallel(types_to_diff)
+        else:
+            results = (self._iter_type_differences(record_type, processed, total)
+                       for record_type in types_to_diff)
+        results = iter(results)
+        
+        current = {} if self.result_cache is not None else None
+        for record_type in record_types:
+            if record_type in previous:
+                differences = self._restore_differences(record_type, previous[record_type])
+            else:
+                differences = next(results)
+                
+            for difference in differences:
+                if current is not None:
+                    current.setdefault(record_type, []).append(self._pack_difference(difference))
+                yield difference
+                
+            processed += self._count_type_records(record_type)
+            if self.progress is not None:
+                self.progress("comparacao", processed, total)
+        
+        # Esgotar o gerador para encerrar o pool de execução, se houver
+        for _ in results:
+            pass
+        
+        if current is not None:
+            self._store_results(record_types, current)
     
-    def _compare_records(self) -> None:
-        """Compara registros entre os dois arquivos."""
+    def _iter_type_differences(self, record_type: str, processed: int, total: int) -> Iterator[RecordDifference]:
+        """Compara um tipo na execução sequencial, reportando o progresso dentro dele.
+        
+        ``processed`` é o número de registros dos tipos já concluídos. A
+        leitura dos registros, o cálculo das chaves (se houver) e a comparação
+        contam, cada um, como uma passada pelos registros do tipo.
+        """
+        if self.progress is None:
+            return iter_record_type_differences(*self._prepare_type_job(record_type))
+        
+        size = self._count_type_records(record_type)
+        preparation = 2 * size if get_key_schema(record_type) is not None else size
+        steps = preparation + size
+        
+        def prepare_progress(done: int) -> None:
+            self.progress("comparacao", processed + done * size // steps, total)
+        
+        def compare_progress(done: int) -> None:
+            self.progress("comparacao", processed + (preparation + done) * size // steps, total)
+        
+        return iter_record_type_differences(*self._prepare_type_job(record_type, prepare_progress),
+                                            progress=compare_progress)
+    
+    def _count_type_records(self, record_type: str) -> int:
+        """Número de registros de um tipo nos dois arquivos."""
+        return self.parser1.record_counts.get(record_type, 0) + self.parser2.record_counts.get(record_type, 0)
+    
+    def _load_previous_results(self, record_types: List[str]) -> Dict[str, list]:
+        """Diferenças guardadas para os tipos cujos blocos não mudaram nos dois arquivos."""
+        if self.result_cache is None:
+            return {}
+            
+        stored_blocks = self.result_cache.load(self.file1_path, self.file2_path, repr(self.rules))
+        if not stored_blocks:
+            return {}
+            
+        blocks1 = self.parser1.get_block_digests()
+        blocks2 = self.parser2.get_block_digests()
+        reusable = {
+            block for block, stored in stored_blocks.items()
+            if stored["digest1"] == blocks1.get(block) and stored["digest2"] == blocks2.get(block)
+        }
+        
+        if reusable:
+            print(f"Reaproveitando resultados anteriores dos blocos: {', '.join(sorted(reusable))}")
+        return {
+            record_type: stored_blocks[record_type[:1]]["types"].get(record_type, [])
+            for record_type in record_types if record_type[:1] in reusable
+        }
+    
+    def _store_results(self, record_types: List[str], differences: Dict[str, list]) -> None:
+        """Guarda as diferenças por bloco junto com os resumos dos blocos."""
+        blocks1 = self.parser1.get_block_digests()
+        blocks2 = self.parser2.get_block_digests()
+        
+        stored_blocks = {}
+        for record_type in record_types:
+            block = record_type[:1]
+            entry = stored_blocks.setdefault(block, {
+                "digest1": blocks1.get(block),
+                "digest2": blocks2.get(block),
+                "types": {}
+            })
+            if record_type in differences:
+                entry["types"][record_type] = differences[record_type]
+                
+        self.result_cache.store(self.file1_path, self.file2_path, stored_blocks, repr(self.rules))
+    
+    def _pack_difference(self, difference: RecordDifference) -> list:
+        """Representação compacta de uma diferença, com os registros pela ordem no bloco."""
+        return [
+            difference.difference_type.name,
+            self.parser1.get_block_offset(difference.record_file1) if difference.record_file1 else None,
+            self.parser2.get_block_offset(difference.record_file2) if difference.record_file2 else None,
+            [[field.field_index, field.field_name, field.old_value, field.new_value]
+             for field in difference.field_differences],
+        ]
+    
+    def _restore_differences(self, record_type: str, packed: list) -> Iterator[RecordDifference]:
+        """Reconstrói diferenças guardadas a partir dos registros atuais dos arquivos."""
+        block = record_type[:1]
+        for difference_type, offset1, offset2, fields in packed:
+            record1 = None if offset1 is None else self.parser1.get_record_at_block_offset(block, offset1)
+            record2 = None if offset2 is None else self.parser2.get_record_at_block_offset(block, offset2)
+            yield RecordDifference(
+                record_type=record_type,
+                difference_type=DifferenceType[difference_type],
+                line_number_file1=record1.line_number if record1 else None,
+                line_number_file2=record2.line_number if record2 else None,
+                record_file1=record1,
+                record_file2=record2,
+                field_differences=[FieldDifference(*field) for field in fields]
+            )
+    
+    def _get_types_to_compare(self) -> List[str]:
+        """Retorna, em ordem, os tipos de registro que precisam ser comparados."""
         # Obter todos os tipos de registros únicos
         types1 = set(self.parser1.get_record_types())
         types2 = set(self.parser2.get_record_types())
         all_types = types1.union(types2)
         
-        for record_type in sorted(all_types):
-            self._compare_records_by_type(record_type)
+        # Arquivos com o mesmo resumo são idênticos: nada a comparar
+        if self.parser1.get_file_digest() == self.parser2.get_file_digest():
+            return []
+        
+        blocks1 = self.parser1.get_block_digests()
+        blocks2 = self.parser2.get_block_digests()
+        
+        # Blocos idênticos nos dois arquivos não precisam ser comparados
+        return [
+            record_type for record_type in sorted(all_types)
+            if not (record_type[:1] in blocks1 and
+                    blocks1.get(record_type[:1]) == blocks2.get(record_type[:1]))
+        ]
     
-    def _compare_records_by_type(self, record_type: str) -> None:
+    def _compare_types_parallel(self, record_types: List[str]) -> Iterator[List[RecordDifference]]:
+        """Compara os tipos de registro em paralelo, devolvendo os resultados em ordem."""
+        if self.executor == "thread":
+            # Montar antes as estruturas criadas sob demanda, que serão compartilhadas
+            for parser in (self.parser1, self.parser2):
+                parser.hierarchy
+                if parser.index is not None:
+                    parser.index.open()
+                    
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                yield from _ordered_map(executor, self._compare_records_by_type,
+                                        record_types, self.workers * 2)
+        else:
+            if self.parser1.index is not None and self.parser2.index is not None:
+                # Backends mmap e colunar: os processos releem os registros do próprio arquivo
+                function = _diff_record_type_locations_job
+                jobs = (self._prepare_type_locations_job(record_type) for record_type in record_types)
+            else:
+                function = _diff_record_type_job
+                jobs = (self._prepare_type_job(record_type) for record_type in record_types)
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                yield from _ordered_map(executor, function, jobs, self.workers * 2)
+    
+    def _compare_records_by_type(self, record_type: str) -> List[RecordDifference]:
         """Compara registros de um tipo específico."""
-        records1 = self.parser1.get_records_by_type(record_type)
-        records2 = self.parser2.get_records_by_type(record_type)
-        
-        # Criar mapeamentos para comparação mais eficiente
-        map1 = self._create_record_map(records1)
-        map2 = self._create_record_map(records2)
-        
-        # Encontrar registros removidos
-        for key in map1:
-            if key not in map2:
-                record = map1[key]
-                self.differences.append(RecordDifference(
-                    record_type=record_type,
-                    difference_type=DifferenceType.RECORD_REMOVED,
-                    line_number_file1=record.line_number,
-                    line_number_file2=None,
-                    record_file1=record,
-                    record_file2=None,
-                    field_differences=[]
-                ))
-        
-        # Encontrar registros adicionados
-        for key in map2:
-            if key not in map1:
-                record = map2[key]
-                self.differences.append(RecordDifference(
-                    record_type=record_type,
-                    difference_type=DifferenceType.RECORD_ADDED,
-                    line_number_file1=None,
-                    line_number_file2=record.line_number,
-                    record_file1=None,
-                    record_file2=record,
-                    field_differences=[]
-                ))
-        
-        # Comparar registros que existem em ambos
-        for key in map1:
-            if key in map2:
-                record1 = map1[key]
-                record2 = map2[key]
-                field_diffs = self._compare_record_fields(record1, record2)
-                
-                if field_diffs:
-                    self.differences.append(RecordDifference(
-                        record_type=record_type,
-                        difference_type=DifferenceType.RECORD_MODIFIED,
-                        line_number_file1=record1.line_number,
-                        line_number_file2=record2.line_number,
-                        record_file1=record1,
-                        record_file2=record2,
-                        field_differences=field_diffs
-                    ))
-    
-    def _create_record_map(self, records: List[SpedRecord]) -> Dict[str, SpedRecord]:
-        """Cria um mapeamento de registros baseado em uma chave única."""
-        record_map = {}
-        
-        for i, record in enumerate(records):
-            # Para registros com múltiplas ocorrências, usar índice na chave
-            key = f"{record.get_key()}_{i}"
-            record_map[key] = record
-            
-        return record_map
+        return diff_record_type(*self._prepare_type_job(record_type))
     
-    def _compare_record_fields(self, record1: SpedRecord, record2: SpedRecord) -> List[FieldDifference]:
-        """Compara os campos entre dois registros."""
-        differences = []
+    def _prepare_type_job(self, record_type: str,
+                          progress: Optional[Callable[[int], None]] = None) -> tuple:
+        """Reúne os registros (e as chaves, se houver) de um tipo nos dois arquivos.
         
-        # Comparar número de campos
-        max_fields = max(len(record1.fields), len(record2.fields))
+        ``progress``, se informado, recebe o número de passos concluídos: os
+        registros (dos dois arquivos) já lidos e, depois, aqueles cujas
+        chaves já foram calculadas.
+        """
+        def offset_progress(offset: int) -> Optional[Callable[[int], None]]:
+            return None if progress is None else lambda count: progress(offset + count)
         
-        for i in range(max_fields):
-            value1 = record1.fields[i] if i < len(record1.fields) else ""
-            value2 = record2.fields[i] if i < len(record2.fields) else ""
-            
-            if value1 != value2:
-                differences.append(FieldDifference(
-                    field_index=i,
-                    field_name=f"Campo_{i}",
-                    old_value=value1,
-                    new_value=value2
-                ))
+        records1 = _load_records(self.parser1.get_records_by_type(record_type), offset_progress(0))
+        records2 = _load_records(self.parser2.get_records_by_type(record_type),
+                                 offset_progress(len(records1)))
+        loaded = len(records1) + len(records2)
+        
+        if get_key_schema(record_type) is None:
+            return record_type, records1, records2, None, None, self.rules
         
-        return differences
+        keys1 = self._get_record_keys(records1, self.parser1, offset_progress(loaded))
+        keys2 = self._get_record_keys(records2, self.parser2, offset_progress(loaded + len(records1)))
+        return record_type, records1, records2, keys1, keys2, self.rules
     
-    def get_summary(self) -> Dict[str, int]:
-        """Retorna um resumo das diferenças encontradas."""
-        summary = {
-            "total_differences": len(self.differences),
-            "records_added": 0,
-            "records_removed": 0,
-            "records_modified": 0
-        }
+    def _prepare_type_locations_job(self, record_type: str) -> tuple:
+        """Reúne a localização dos registros de um tipo nos dois arquivos e as chaves dos pais."""
+        locations1 = self.parser1.get_type_locations(record_type)
+        locations2 = self.parser2.get_type_locations(record_type)
         
-        for diff in self.differences:
-            if diff.difference_type == DifferenceType.RECORD_ADDED:
-                summary["records_added"] += 1
-            elif diff.difference_type == DifferenceType.RECORD_REMOVED:
-                summary["records_removed"] += 1
-            elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
-                summary["records_modified"] += 1
+        parent_keys1 = parent_keys2 = None
+        schema = get_key_schema(record_type)
+        if schema is not None and schema.include_parent:
+            parent_keys1 = self._get_parent_keys(self.parser1, locations1[2])
+            parent_keys2 = self._get_parent_keys(self.parser2, locations2[2])
+        return record_type, locations1, locations2, parent_keys1, parent_keys2, self.rules
+    
+    def _get_parent_keys(self, parser: SpedParser, line_numbers: Iterable[int]) -> List[str]:
+        """Chaves dos pais dos registros das linhas indicadas."""
+        cache: Dict[int, str] = {}
+        return [self._get_parent_key(parser, line_number, cache) for line_number in line_numbers]
+    
+    def _get_record_keys(self, records: Sequence[SpedRecord], parser: Optional[SpedParser] = None,
+                         progress: Optional[Callable[[int], None]] = None) -> List[str]:
+        """Calcula as chaves semânticas de registros de um mesmo tipo.
+        
+        Registros com chave semântica no leiaute (ex.: C100 pela CHV_NFE,
+        C170 pelo C100 pai + NUM_ITEM) são casados pela chave, de forma que
+        uma inserção não desloca os demais. Chaves repetidas recebem o número
+        da ocorrência. ``progress`` recebe periodicamente o número de
+        registros já processados.
+        """
+        if not records:
+            return []
+            
+        parent_keys = None
+        if get_key_schema(records[0].record_type).include_parent and parser is not None:
+            cache: Dict[int, str] = {}
+            parent_keys = (self._get_parent_key(parser, record.line_number, cache) for record in records)
+        return compute_record_keys(records, parent_keys, progress)
+    
+    def _get_parent_key(self, parser: SpedParser, line_number: int,
+                        parent_keys: Dict[int, str]) -> str:
+        """Retorna a chave do pai do registro da linha ``line_number`` (memorizada por número da linha)."""
+        parent = parser.get_parent_at_line(line_number)
+        if parent is None:
+            return ""
+            
+        key = parent_keys.get(parent.line_number)
+        if key is None:
+            schema = get_key_schema(parent.record_type)
+            if schema is None:
+                key = parent.get_key()
+            else:
+                grandparent_key = None
+                if schema.include_parent:
+                    grandparent_key = self._get_parent_key(parser, parent.line_number, parent_keys)
+                key = build_record_key(parent.record_type, parent.fields, schema, grandparent_key)
+            parent_keys[parent.line_number] = key
+            
+        return key
+    
+    def get_summary(self) -> Dict[str, int]:
+        """Retorna um resumo das diferenças encontradas.
         
-        return summary
+        Os contadores são atualizados durante a comparação, sem percorrer
+        a lista de diferenças.
+        """
+        return dict(self._summary)
+    
+    def get_statistics_by_type(self) -> Dict[str, Dict[str, int]]:
+        """Retorna a contagem de diferenças (total, adicionados, removidos e
+        modificados) por tipo de registro."""
+        return {record_type: dict(counts) for record_type, counts in self._counts_by_type.items()}
     
     def get_differences_by_type(self, record_type: str) -> List[RecordDifference]:
         """Retorna diferenças filtradas por tipo de registro."""
-        return [diff for diff in self.differences if diff.record_type == record_type]
\ No newline at end of file
+        return self._differences_by_type.get(record_type, [])
+
+
+def _load_records(records: Iterable[SpedRecord],
+                  progress: Optional[Callable[[int], None]] = None) -> List[SpedRecord]:
+    """Materializa os registros em uma lista, chamando ``progress`` a cada ``PROGRESS_INTERVAL``."""
+    if progress is None:
+        return list(records)
+    
+    loaded = []
+    for count, record in enumerate(records):
+        if count % PROGRESS_INTERVAL == 0:
+            progress(count)
+        loaded.append(record)
+    return loaded
+
+
+def _ordered_map(executor, function: Callable, items: Iterable, window: int) -> Iterator:
+    """Aplica ``function`` aos itens no executor, mantendo no máximo ``window``
+    tarefas pendentes e devolvendo os resultados na ordem dos itens.
+    
+    Se a iteração for interrompida (cancelamento, erro ou gerador fechado),
+    as tarefas que ainda não começaram são canceladas, para que a saída do
+    executor espere apenas pelas que já estão em execução.
+    """
+    pending = []
+    try:
+        for item in items:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= window:
+                yield pending.pop(0).result()
+        while pending:
+            yield pending.pop(0).result()
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
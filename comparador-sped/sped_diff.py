@@ -0,0 +1,219 @@
+"""
+Módulo de alinhamento de sequências de registros SPED sem chave natural.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+# Pares (índice na sequência 1, índice na sequência 2); None indica ausência
+AlignedPair = Tuple[Optional[int], Optional[int]]
+
+# Número máximo de edições procuradas pelo diff de Myers em um trecho sem âncoras
+MAX_DIFF_EDITS = 2000
+
+
+def align_sequences(seq1: Sequence[Hashable], seq2: Sequence[Hashable]) -> List[AlignedPair]:
+    """Alinha duas sequências de hashes no estilo patience diff.
+    
+    Elementos que aparecem uma única vez em cada lado servem de âncoras
+    (maior subsequência crescente entre eles); os trechos entre âncoras são
+    processados da mesma forma até não haver mais âncoras. Os trechos sem
+    âncoras (conteúdo repetitivo) passam pelo diff de Myers, limitado a
+    ``MAX_DIFF_EDITS`` edições; acima disso, as ocorrências do elemento comum
+    mais raro viram âncoras. Só quando um trecho não tem nenhum elemento em
+    comum os elementos são pareados pela posição, e os excedentes ficam como
+    removidos (i, None) ou adicionados (None, j).
+    
+    Pares (i, j) indicam registros correspondentes, iguais ou não. O custo é
+    O(n log n) com âncoras e O(n·d) no diff de Myers, com d edições.
+    """
+    result: List[AlignedPair] = []
+    
+    # Pilha de tarefas: trechos a alinhar ou pares já resolvidos
+    tasks: List[tuple] = [(0, len(seq1), 0, len(seq2))]
+    while tasks:
+        task = tasks.pop()
+        if len(task) == 2:
+            result.append(task)
+            continue
+        
+        lo1, hi1, lo2, hi2 = task
+        
+        # Prefixo comum
+        while lo1 < hi1 and lo2 < hi2 and seq1[lo1] == seq2[lo2]:
+            result.append((lo1, lo2))
+            lo1 += 1
+            lo2 += 1
+        
+        # Sufixo comum (emitido depois do miolo)
+        suffix: List[AlignedPair] = []
+        while lo1 < hi1 and lo2 < hi2 and seq1[hi1 - 1] == seq2[hi2 - 1]:
+            hi1 -= 1
+            hi2 -= 1
+            suffix.append((hi1, hi2))
+        for pair in suffix:
+            tasks.append(pair)
+        
+        if lo1 == hi1 or lo2 == hi2:
+            result.extend((i, None) for i in range(lo1, hi1))
+            result.extend((None, j) for j in range(lo2, hi2))
+            continue
+        
+        anchors = _find_anchors(seq1, lo1, hi1, seq2, lo2, hi2)
+        if not anchors:
+            anchors = _match_repeated(seq1, lo1, hi1, seq2, lo2, hi2)
+        if not anchors:
+            # Nenhum elemento em comum: parear pela posição
+            paired = min(hi1 - lo1, hi2 - lo2)
+            result.extend((lo1 + k, lo2 + k) for k in range(paired))
+            result.extend((i, None) for i in range(lo1 + paired, hi1))
+            result.extend((None, j) for j in range(lo2 + paired, hi2))
+            continue
+        
+        # Empilhar em ordem inversa: trecho final, âncora, ..., trecho inicial
+        next1, next2 = hi1, hi2
+        for i, j in reversed(anchors):
+            tasks.append((i + 1, next1, j + 1, next2))
+            tasks.append((i, j))
+            next1, next2 = i, j
+        tasks.append((lo1, next1, lo2, next2))
+    
+    return result
+
+
+def _find_anchors(seq1: Sequence[Hashable], lo1: int, hi1: int,
+                  seq2: Sequence[Hashable], lo2: int, hi2: int) -> List[Tuple[int, int]]:
+    """Retorna os pares de elementos únicos nos dois trechos, em ordem crescente em ambos."""
+    unique1: Dict[Hashable, Optional[int]] = {}
+    for i in range(lo1, hi1):
+        unique1[seq1[i]] = None if seq1[i] in unique1 else i
+    
+    unique2: Dict[Hashable, Optional[int]] = {}
+    for j in range(lo2, hi2):
+        value = seq2[j]
+        if value in unique1:
+            unique2[value] = None if value in unique2 else j
+    
+    candidates = [
+        (unique1[value], j) for value, j in unique2.items()
+        if j is not None and unique1[value] is not None
+    ]
+    candidates.sort()
+    
+    return _longest_increasing(candidates)
+
+
+def _match_repeated(seq1: Sequence[Hashable], lo1: int, hi1: int,
+                    seq2: Sequence[Hashable], lo2: int, hi2: int) -> List[Tuple[int, int]]:
+    """Casa os elementos iguais de um trecho sem elementos únicos.
+    
+    Usa o diff de Myers (``_myers_matches``); se o trecho tiver mais de
+    ``MAX_DIFF_EDITS`` edições, casa as ocorrências do elemento comum mais
+    raro, na ordem. Retorna lista vazia se não houver elementos em comum.
+    """
+    counts1 = Counter(seq1[i] for i in range(lo1, hi1))
+    counts2 = Counter(seq2[j] for j in range(lo2, hi2))
+    common = [value for value in counts1 if value in counts2]
+    if not common:
+        return []
+    
+    matches = _myers_matches(seq1, lo1, hi1, seq2, lo2, hi2, MAX_DIFF_EDITS)
+    if matches is not None:
+        return matches
+    
+    rarest = min(common, key=lambda value: max(counts1[value], counts2[value]))
+    positions1 = [i for i in range(lo1, hi1) if seq1[i] == rarest]
+    positions2 = [j for j in range(lo2, hi2) if seq2[j] == rarest]
+    return list(zip(positions1, positions2))
+
+
+def _myers_matches(seq1: Sequence[Hashable], lo1: int, hi1: int,
+                   seq2: Sequence[Hashable], lo2: int, hi2: int,
+                   max_edits: int) -> Optional[List[Tuple[int, int]]]:
+    """Pares de elementos iguais do menor script de edição (Myers, 1986).
+    
+    Retorna None se o script tiver mais de ``max_edits`` edições. Guarda a
+    fronteira de cada passo para reconstruir o caminho: memória O(d²).
+    """
+    n, m = hi1 - lo1, hi2 - lo2
+    
+    # frontiers[d][i]: maior x alcançado com d edições na diagonal k = 2i - d
+    frontiers: List[List[int]] = []
+    previous = [0]
+    for d in range(min(max_edits, n + m) + 1):
+        current = [0] * (d + 1)
+        for i in range(d + 1):
+            if i == 0 or (i != d and previous[i - 1] < previous[i]):
+                x = previous[i]
+            else:
+                x = previous[i - 1] + 1
+            y = x - (2 * i - d)
+            while x < n and y < m and seq1[lo1 + x] == seq2[lo2 + y]:
+                x += 1
+                y += 1
+            current[i] = x
+            if x >= n and y >= m:
+                frontiers.append(current)
+                return _myers_backtrack(frontiers, n, m, lo1, lo2)
+        frontiers.append(current)
+        previous = current
+    return None
+
+
+def _myers_backtrack(frontiers: List[List[int]], x: int, y: int,
+                     lo1: int, lo2: int) -> List[Tuple[int, int]]:
+    """Reconstrói, do fim para o início, os pares iguais do caminho de Myers."""
+    matches: List[Tuple[int, int]] = []
+    for d in range(len(frontiers) - 1, -1, -1):
+        k = x - y
+        i = (k + d) // 2
+        if d == 0:
+            start_x = start_y = 0
+        else:
+            previous = frontiers[d - 1]
+            if i == 0 or (i != d and previous[i - 1] < previous[i]):
+                # Veio da diagonal k + 1 por uma inserção
+                previous_x = previous[i]
+                previous_y = previous_x - (k + 1)
+                start_x, start_y = previous_x, previous_y + 1
+            else:
+                # Veio da diagonal k - 1 por uma remoção
+                previous_x = previous[i - 1]
+                previous_y = previous_x - (k - 1)
+                start_x, start_y = previous_x + 1, previous_y
+        while x > start_x and y > start_y:
+            x -= 1
+            y -= 1
+            matches.append((lo1 + x, lo2 + y))
+        if d > 0:
+            x, y = previous_x, previous_y
+    matches.reverse()
+    return matches
+
+
+def _longest_increasing(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Maior subsequência de pares com o segundo elemento crescente (patience sorting)."""
+    tails: List[int] = []
+    tail_indexes: List[int] = []
+    previous: List[int] = [-1] * len(pairs)
+    
+    for k, (_, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile > 0:
+            previous[k] = tail_indexes[pile - 1]
+        if pile == len(tails):
+            tails.append(j)
+            tail_indexes.append(k)
+        else:
+            tails[pile] = j
+            tail_indexes[pile] = k
+    
+    sequence: List[Tuple[int, int]] = []
+    k = tail_indexes[-1] if tail_indexes else -1
+    while k >= 0:
+        sequence.append(pairs[k])
+        k = previous[k]
+    sequence.reverse()
+    return sequence
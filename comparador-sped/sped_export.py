@@ -0,0 +1,158 @@
+"""
+Módulo para exportação das diferenças de comparação SPED em formatos
+legíveis por máquina (JSON Lines, CSV e Parquet).
+"""
+
+import csv
+import json
+from typing import List, Dict, Iterable, Iterator, Optional
+from pathlib import Path
+from sped_comparator import SpedComparator, RecordDifference
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pyarrow é opcional, usado apenas na exportação Parquet
+    pyarrow = None
+    parquet = None
+
+
+class SpedDiffExporter:
+    """Exporta as diferenças de uma comparação SPED, uma linha por campo alterado.
+
+    Registros adicionados ou removidos (sem diferenças de campo) geram uma
+    única linha com ``field_index`` vazio e a linha bruta do registro no
+    valor antigo ou novo. As linhas são gravadas em lotes de
+    ``BATCH_SIZE`` para que a escrita seja feita em bloco.
+    """
+
+    COLUMNS = ("file1", "file2", "record_type", "difference_type", "line_file1", "line_file2",
+               "field_index", "field_name", "old_value", "new_value")
+    BATCH_SIZE = 10000
+    FORMATS = ("jsonl", "csv", "parquet")
+
+    def __init__(self, comparator: SpedComparator):
+        self.comparator = comparator
+
+    def export(self, output_file: str, format: Optional[str] = None,
+               differences: Optional[Iterable[RecordDifference]] = None) -> int:
+        """Exporta as diferenças para ``output_file``.
+
+        O formato é deduzido da extensão do arquivo quando não informado.
+        Sem ``differences``, usa as diferenças já calculadas pelo comparador
+        ou, se ``compare()`` ainda não foi chamado, consome
+        ``iter_differences()`` em fluxo. Retorna o número de linhas gravadas.
+        """
+        if format is None:
+            format = Path(output_file).suffix.lstrip('.').lower()
+        if format not in self.FORMATS:
+            raise ValueError(f"Formato de exportação inválido: {format!r} (use {', '.join(self.FORMATS)})")
+
+        if differences is None:
+            differences = (self.comparator.differences if self.comparator.compared
+                           else self.comparator.iter_differences())
+
+        writer = getattr(self, f"_write_{format}")
+        total = writer(output_file, self._iter_batches(differences))
+        print(f"Diferenças exportadas ({format}): {output_file} ({total} linhas)")
+        return total
+
+    def export_jsonl(self, output_file: str, differences: Optional[Iterable[RecordDifference]] = None) -> int:
+        """Exporta as diferenças em JSON Lines."""
+        return self.export(output_file, "jsonl", differences)
+
+    def export_csv(self, output_file: str, differences: Optional[Iterable[RecordDifference]] = None) -> int:
+        """Exporta as diferenças em CSV."""
+        return self.export(output_file, "csv", differences)
+
+    def export_parquet(self, output_file: str, differences: Optional[Iterable[RecordDifference]] = None) -> int:
+        """Exporta as diferenças em Parquet (requer pyarrow)."""
+        return self.export(output_file, "parquet", differences)
+
+    def iter_rows(self, differences: Iterable[RecordDifference]) -> Iterator[Dict]:
+        """Converte diferenças de registro em linhas, uma por campo alterado."""
+        file1 = Path(self.comparator.file1_path).name
+        file2 = Path(self.comparator.file2_path).name
+
+        for diff in differences:
+            base = {
+                "file1": file1,
+                "file2": file2,
+                "record_type": diff.record_type,
+                "difference_type": diff.difference_type.name,
+                "line_file1": diff.line_number_file1,
+                "line_file2": diff.line_number_file2,
+            }
+
+            if diff.field_differences:
+                for field_diff in diff.field_differences:
+                    row = dict(base)
+                    row["field_index"] = field_diff.field_index
+                    row["field_name"] = field_diff.field_name
+                    row["old_value"] = field_diff.old_value
+                    row["new_value"] = field_diff.new_value
+                    yield row
+            else:
+                row = dict(base)
+                row["field_index"] = None
+                row["field_name"] = None
+                row["old_value"] = diff.record_file1.raw_line if diff.record_file1 else None
+                row["new_value"] = diff.record_file2.raw_line if diff.record_file2 else None
+                yield row
+
+    def _iter_batches(self, differences: Iterable[RecordDifference]) -> Iterator[List[Dict]]:
+        """Agrupa as linhas em lotes de ``BATCH_SIZE``."""
+        batch = []
+        for row in self.iter_rows(differences):
+            batch.append(row)
+            if len(batch) >= self.BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _write_jsonl(self, output_file: str, batches: Iterable[List[Dict]]) -> int:
+        """Grava os lotes em JSON Lines."""
+        total = 0
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for batch in batches:
+                f.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in batch))
+                total += len(batch)
+        return total
+
+    def _write_csv(self, output_file: str, batches: Iterable[List[Dict]]) -> int:
+        """Grava os lotes em CSV com cabeçalho."""
+        total = 0
+        with open(output_file, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=self.COLUMNS)
+            writer.writeheader()
+            for batch in batches:
+                writer.writerows(batch)
+                total += len(batch)
+        return total
+
+    def _write_parquet(self, output_file: str, batches: Iterable[List[Dict]]) -> int:
+        """Grava os lotes em Parquet, um row group por lote."""
+        if pyarrow is None:
+            raise ImportError("A exportação Parquet requer o pacote pyarrow (pip install pyarrow)")
+
+        schema = pyarrow.schema([
+            ("file1", pyarrow.string()),
+            ("file2", pyarrow.string()),
+            ("record_type", pyarrow.string()),
+            ("difference_type", pyarrow.string()),
+            ("line_file1", pyarrow.int64()),
+            ("line_file2", pyarrow.int64()),
+            ("field_index", pyarrow.int32()),
+            ("field_name", pyarrow.string()),
+            ("old_value", pyarrow.string()),
+            ("new_value", pyarrow.string()),
+        ])
+
+        total = 0
+        with parquet.ParquetWriter(output_file, schema) as writer:
+            for batch in batches:
+                columns = {column: [row[column] for row in batch] for column in self.COLUMNS}
+                writer.write_table(pyarrow.Table.from_pydict(columns, schema=schema))
+                total += len(batch)
+        return total
@@ -0,0 +1,110 @@
+"""
+Módulo com o índice hierárquico (bloco / registro pai / filhos) de arquivos SPED.
+"""
+
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Optional
+
+from sped_layout import get_register_level
+
+
+class SpedHierarchy:
+    """Índice pai/filho dos registros de um arquivo SPED.
+    
+    Os registros são identificados pela posição em ``SpedParser.records``.
+    Como o arquivo SPED lista cada registro pai seguido de seus filhos, os
+    descendentes de uma posição formam um intervalo contíguo; o índice guarda
+    apenas o pai e o fim da subárvore de cada registro (duas colunas
+    ``array``), o que permite obter filhos e descendentes em O(filhos).
+    """
+    
+    def __init__(self):
+        self.parents = array('i')
+        self.subtree_ends = array('I')
+        self.line_numbers = array('I')
+        self.block_ranges: Dict[str, List[range]] = {}
+        self._stack: List[tuple] = []
+        self._levels: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.parents)
+    
+    def add(self, record_type: str, line_number: int) -> None:
+        """Adiciona o próximo registro, na ordem do arquivo."""
+        position = len(self.parents)
+        level = self._levels.get(record_type)
+        if level is None:
+            level = self._levels[record_type] = get_register_level(record_type)
+        
+        # Fechar as subárvores de registros de nível igual ou mais profundo
+        while self._stack and self._stack[-1][0] >= level:
+            self.subtree_ends[self._stack.pop()[1]] = position
+        
+        self.parents.append(self._stack[-1][1] if self._stack else -1)
+        self.subtree_ends.append(position + 1)
+        self.line_numbers.append(line_number)
+        self._stack.append((level, position))
+        
+        # Blocos normalmente são contíguos; guardar intervalos por segurança
+        ranges = self.block_ranges.setdefault(record_type[:1], [])
+        if ranges and ranges[-1].stop == position:
+            ranges[-1] = range(ranges[-1].start, position + 1)
+        else:
+            ranges.append(range(position, position + 1))
+    
+    def finish(self) -> None:
+        """Fecha as subárvores pendentes ao final do arquivo."""
+        total = len(self.parents)
+        while self._stack:
+            self.subtree_ends[self._stack.pop()[1]] = total
+    
+    def get_parent(self, position: int) -> Optional[int]:
+        """Retorna a posição do registro pai, ou None para a raiz."""
+        parent = self.parents[position]
+        return None if parent < 0 else parent
+    
+    def iter_children(self, position: int) -> Iterator[int]:
+        """Gera as posições dos filhos diretos de um registro."""
+        child = position + 1
+        end = self.subtree_ends[position]
+        while child < end:
+            yield child
+            child = self.subtree_ends[child]
+    
+    def get_descendants(self, position: int) -> range:
+        """Retorna o intervalo de posições de todos os descendentes."""
+        return range(position + 1, self.subtree_ends[position])
+    
+    def get_blocks(self) -> List[str]:
+        """Retorna os blocos presentes no arquivo, na ordem em que aparecem."""
+        return list(self.block_ranges.keys())
+    
+    def iter_block(self, block: str) -> Iterator[int]:
+        """Gera as posições de todos os registros de um bloco (ex.: 'E')."""
+        for positions in self.block_ranges.get(block, []):
+            yield from positions
+    
+    def get_block_offset(self, block: str, position: int) -> Optional[int]:
+        """Retorna a ordem de um registro dentro do seu bloco (0 = primeiro)."""
+        offset = 0
+        for positions in self.block_ranges.get(block, []):
+            if position in positions:
+                return offset + position - positions.start
+            offset += len(positions)
+        return None
+    
+    def get_block_position(self, block: str, offset: int) -> Optional[int]:
+        """Retorna a posição do registro de ordem ``offset`` dentro do bloco."""
+        for positions in self.block_ranges.get(block, []):
+            if offset < len(positions):
+                return positions[offset]
+            offset -= len(positions)
+        return None
+    
+    def find_position(self, line_number: int) -> Optional[int]:
+        """Localiza a posição de um registro pelo número da linha."""
+        position = bisect_left(self.line_numbers, line_number)
+        if position < len(self.line_numbers) and self.line_numbers[position] == line_number:
+            return position
+        return None
@@ -0,0 +1,369 @@
+"""
+Módulo com informações de leiaute dos registros da EFD ICMS/IPI.
+"""
+
+from decimal import Decimal, InvalidOperation
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple, Union
+from dataclasses import dataclass
+
+
+# Nível hierárquico dos principais registros (Guia Prático da EFD ICMS/IPI).
+# O registro 0000 é a raiz (nível 0); as aberturas e encerramentos de bloco
+# (X001/X990) têm nível 1 e os demais registros ficam abaixo deles.
+REGISTER_LEVELS: Dict[str, int] = {
+    # Bloco 0
+    "0000": 0, "0001": 1, "0002": 2, "0005": 2, "0015": 2, "0100": 2,
+    "0150": 2, "0175": 3, "0190": 2, "0200": 2, "0205": 3, "0206": 3,
+    "0210": 3, "0220": 3, "0221": 3, "0300": 2, "0305": 3, "0400": 2,
+    "0450": 2, "0460": 2, "0500": 2, "0600": 2, "0990": 1,
+    # Bloco B
+    "B001": 1, "B020": 2, "B025": 3, "B030": 2, "B035": 3, "B350": 2,
+    "B420": 2, "B440": 2, "B460": 2, "B470": 2, "B500": 2, "B510": 3,
+    "B990": 1,
+    # Bloco C
+    "C001": 1, "C100": 2, "C101": 3, "C105": 3, "C110": 3, "C111": 4,
+    "C112": 4, "C113": 4, "C114": 4, "C115": 4, "C116": 4, "C120": 3,
+    "C130": 3, "C140": 3, "C141": 4, "C160": 3, "C165": 3, "C170": 3,
+    "C171": 4, "C172": 4, "C173": 4, "C174": 4, "C175": 4, "C176": 4,
+    "C177": 4, "C178": 4, "C179": 4, "C180": 4, "C181": 4, "C185": 3,
+    "C186": 3, "C190": 3, "C191": 4, "C195": 3, "C197": 4, "C300": 2,
+    "C310": 3, "C320": 3, "C321": 4, "C330": 3, "C350": 2, "C370": 3,
+    "C380": 3, "C390": 3, "C400": 2, "C405": 3, "C410": 4, "C420": 4,
+    "C425": 5, "C430": 5, "C460": 4, "C465": 5, "C470": 5, "C480": 5,
+    "C490": 4, "C495": 2, "C500": 2, "C510": 3, "C590": 3, "C591": 4,
+    "C595": 3, "C597": 4, "C600": 2, "C601": 3, "C610": 3, "C690": 3,
+    "C700": 2, "C790": 3, "C791": 4, "C800": 2, "C810": 3, "C815": 4,
+    "C850": 3, "C855": 3, "C857": 4, "C860": 2, "C870": 3, "C880": 3,
+    "C890": 3, "C895": 3, "C897": 4, "C990": 1,
+    # Bloco D
+    "D001": 1, "D100": 2, "D101": 3, "D110": 3, "D120": 4, "D130": 3,
+    "D140": 3, "D150": 3, "D160": 3, "D161": 4, "D162": 4, "D170": 3,
+    "D180": 3, "D190": 3, "D195": 3, "D197": 4, "D300": 2, "D301": 3,
+    "D310": 3, "D350": 2, "D355": 3, "D360": 4, "D365": 4, "D370": 5,
+    "D390": 4, "D400": 2, "D410": 3, "D411": 4, "D420": 3, "D500": 2,
+    "D510": 3, "D530": 3, "D590": 3, "D600": 2, "D610": 3, "D690": 3,
+    "D695": 2, "D696": 3, "D697": 4, "D700": 2, "D730": 3, "D731": 4,
+    "D735": 3, "D737": 4, "D750": 2, "D760": 3, "D761": 4, "D990": 1,
+    # Bloco E
+    "E001": 1, "E100": 2, "E110": 3, "E111": 4, "E112": 5, "E113": 5,
+    "E115": 4, "E116": 4, "E200": 2, "E210": 3, "E220": 4, "E230": 5,
+    "E240": 5, "E250": 4, "E300": 2, "E310": 3, "E311": 4, "E312": 5,
+    "E313": 5, "E316": 4, "E500": 2, "E510": 3, "E520": 3, "E530": 4,
+    "E531": 5, "E990": 1,
+    # Bloco G
+    "G001": 1, "G110": 2, "G125": 3, "G126": 4, "G130": 4, "G140": 5,
+    "G990": 1,
+    # Bloco H
+    "H001": 1, "H005": 2, "H010": 3, "H020": 4, "H030": 4, "H990": 1,
+    # Bloco K
+    "K001": 1, "K010": 2, "K100": 2, "K200": 3, "K210": 3, "K215": 4,
+    "K220": 3, "K230": 3, "K235": 4, "K250": 3, "K255": 4, "K260": 3,
+    "K265": 4, "K270": 3, "K275": 4, "K280": 3, "K290": 3, "K291": 4,
+    "K292": 4, "K300": 3, "K301": 4, "K302": 4, "K990": 1,
+    # Bloco 1
+    "1001": 1, "1010": 2, "1100": 2, "1105": 3, "1110": 4, "1200": 2,
+    "1210": 3, "1250": 2, "1255": 3, "1300": 2, "1310": 3, "1320": 4,
+    "1350": 2, "1360": 3, "1370": 3, "1390": 2, "1391": 3, "1400": 2,
+    "1500": 2, "1510": 3, "1600": 2, "1601": 2, "1700": 2, "1710": 3,
+    "1800": 2, "1900": 2, "1910": 3, "1920": 4, "1921": 5, "1922": 6,
+    "1923": 6, "1925": 5, "1926": 5, "1960": 2, "1970": 2, "1975": 3,
+    "1980": 2, "1990": 1,
+    # Bloco 9
+    "9001": 1, "9900": 2, "9990": 1, "9999": 0,
+}
+
+
+def get_register_level(record_type: str) -> int:
+    """Retorna o nível hierárquico de um registro.
+    
+    Registros fora da tabela seguem a convenção de nomes do leiaute:
+    X001/X990 abrem e fecham blocos, XN00 são registros pai e os demais
+    são filhos do registro pai anterior.
+    """
+    level = REGISTER_LEVELS.get(record_type)
+    if level is not None:
+        return level
+    if record_type in ("0000", "9999"):
+        return 0
+    if record_type.endswith("001") or record_type.endswith("990"):
+        return 1
+    if record_type.endswith("00"):
+        return 2
+    return 3
+
+
+@dataclass(frozen=True)
+class RecordKeySchema:
+    """Campos que identificam um registro de forma estável entre dois arquivos.
+    
+    Os índices se referem a ``SpedRecord.fields`` (o índice 0 é o próprio REG).
+    Se ``include_parent`` for verdadeiro a chave do registro pai é incluída
+    (ex.: C170 = chave do C100 + NUM_ITEM). ``fallback_fields`` é usado quando
+    algum campo principal está vazio (ex.: C100 sem CHV_NFE).
+    """
+    fields: Tuple[int, ...] = ()
+    include_parent: bool = False
+    fallback_fields: Tuple[int, ...] = ()
+
+
+# Chaves semânticas dos principais registros da EFD ICMS/IPI
+RECORD_KEYS: Dict[str, RecordKeySchema] = {
+    "0000": RecordKeySchema(),
+    "0005": RecordKeySchema(),
+    "0100": RecordKeySchema(),
+    "0150": RecordKeySchema(fields=(1,)),                      # COD_PART
+    "0175": RecordKeySchema(fields=(1, 2), include_parent=True),  # DT_ALT, NR_CAMPO
+    "0190": RecordKeySchema(fields=(1,)),                      # UNID
+    "0200": RecordKeySchema(fields=(1,)),                      # COD_ITEM
+    "0205": RecordKeySchema(fields=(2,), include_parent=True),    # DT_INI
+    "0220": RecordKeySchema(fields=(1,), include_parent=True),    # UNID_CONV
+    "0400": RecordKeySchema(fields=(1,)),                      # COD_NAT
+    "0450": RecordKeySchema(fields=(1,)),                      # COD_INF
+    "0460": RecordKeySchema(fields=(1,)),                      # COD_OBS
+    "0500": RecordKeySchema(fields=(5,)),                      # COD_CTA
+    # CHV_NFE; sem chave: IND_OPER, IND_EMIT, COD_PART, COD_MOD, SER, NUM_DOC
+    "C100": RecordKeySchema(fields=(8,), fallback_fields=(1, 2, 3, 4, 6, 7)),
+    "C101": RecordKeySchema(include_parent=True),
+    "C110": RecordKeySchema(fields=(1,), include_parent=True),    # COD_INF
+    "C170": RecordKeySchema(fields=(1,), include_parent=True),    # NUM_ITEM
+    "C190": RecordKeySchema(fields=(1, 2, 3), include_parent=True),  # CST, CFOP, ALIQ
+    "C195": RecordKeySchema(fields=(1,), include_parent=True),    # COD_OBS
+    "C197": RecordKeySchema(fields=(1,), include_parent=True),    # COD_AJ
+    # IND_OPER, IND_EMIT, COD_PART, COD_MOD, SER, SUB, NUM_DOC
+    "C500": RecordKeySchema(fields=(1, 2, 3, 4, 6, 7, 9)),
+    "C590": RecordKeySchema(fields=(1, 2, 3), include_parent=True),  # CST, CFOP, ALIQ
+    # CHV_CTE; sem chave: IND_OPER, IND_EMIT, COD_PART, COD_MOD, SER, SUB, NUM_DOC
+    "D100": RecordKeySchema(fields=(9,), fallback_fields=(1, 2, 3, 4, 6, 7, 8)),
+    "D190": RecordKeySchema(fields=(1, 2, 3), include_parent=True),  # CST, CFOP, ALIQ
+    "E100": RecordKeySchema(fields=(1, 2)),                    # DT_INI, DT_FIN
+    "E110": RecordKeySchema(include_parent=True),
+    "E111": RecordKeySchema(fields=(1,), include_parent=True),    # COD_AJ_APUR
+    "E200": RecordKeySchema(fields=(1, 2)),                    # UF, DT_INI
+    "E210": RecordKeySchema(include_parent=True),
+    "E300": RecordKeySchema(fields=(1, 2)),                    # UF, DT_INI
+    "E500": RecordKeySchema(fields=(1, 2)),                    # IND_APUR, DT_INI
+    "E520": RecordKeySchema(include_parent=True),
+    "H005": RecordKeySchema(fields=(1, 3)),                    # DT_INV, MOT_INV
+    # COD_ITEM, IND_PROP, COD_PART
+    "H010": RecordKeySchema(fields=(1, 6, 7), include_parent=True),
+    # DT_EST, COD_ITEM, IND_EST, COD_PART
+    "K200": RecordKeySchema(fields=(1, 2, 4, 5), include_parent=True),
+    "9900": RecordKeySchema(fields=(1,)),                      # REG_BLC
+}
+
+
+def get_key_schema(record_type: str) -> Optional[RecordKeySchema]:
+    """Retorna a chave semântica de um registro, ou None se não houver.
+    
+    Aberturas e encerramentos de bloco (X001/X990) e o 9999 ocorrem uma
+    única vez por arquivo e são identificados apenas pelo tipo.
+    """
+    schema = RECORD_KEYS.get(record_type)
+    if schema is not None:
+        return schema
+    if record_type == "9999" or record_type.endswith("001") or record_type.endswith("990"):
+        return RecordKeySchema()
+    return None
+
+
+def build_record_key(record_type: str, fields: List[str], schema: RecordKeySchema,
+                     parent_key: Optional[str] = None) -> str:
+    """Monta a chave de um registro a partir do seu esquema."""
+    key_indexes = schema.fields
+    if schema.fallback_fields and any(
+            i >= len(fields) or not fields[i] for i in key_indexes):
+        key_indexes = schema.fallback_fields
+    
+    parts = [record_type]
+    if schema.include_parent:
+        parts.append(f"[{parent_key or ''}]")
+    parts.extend(fields[i] if i < len(fields) else "" for i in key_indexes)
+    return "|".join(parts)
+
+
+@dataclass(frozen=True)
+class FieldLayout:
+    """Leiaute de um campo: nome, tipo ("C" alfanumérico ou "N" numérico) e casas decimais."""
+    name: str
+    type: str = "C"
+    decimals: int = 0
+
+
+# Campos dos principais registros da EFD ICMS/IPI, na ordem do leiaute.
+# Cada campo é "NOME" (alfanumérico) ou "NOME:N<casas decimais>" (numérico).
+_LAYOUT_SPECS: Dict[str, str] = {
+    "0000": "REG COD_VER COD_FIN DT_INI DT_FIN NOME CNPJ CPF UF IE COD_MUN IM SUFRAMA "
+            "IND_PERFIL IND_ATIV",
+    "0005": "REG FANTASIA CEP END NUM COMPL BAIRRO FONE FAX EMAIL",
+    "0100": "REG NOME CPF CRC CNPJ CEP END NUM COMPL BAIRRO FONE FAX EMAIL COD_MUN",
+    "0150": "REG COD_PART NOME COD_PAIS CNPJ CPF IE COD_MUN SUFRAMA END NUM COMPL BAIRRO",
+    "0175": "REG DT_ALT NR_CAMPO CONT_ANT",
+    "0190": "REG UNID DESCR",
+    "0200": "REG COD_ITEM DESCR_ITEM COD_BARRA COD_ANT_ITEM UNID_INV TIPO_ITEM COD_NCM "
+            "EX_IPI COD_GEN COD_LST ALIQ_ICMS:N2 CEST",
+    "0205": "REG DESCR_ANT_ITEM DT_INI DT_FIM COD_ANT_ITEM",
+    "0220": "REG UNID_CONV FAT_CONV:N6 COD_BARRA",
+    "0400": "REG COD_NAT DESCR_NAT",
+    "0450": "REG COD_INF TXT",
+    "0460": "REG COD_OBS TXT",
+    "0500": "REG DT_ALT COD_NAT_CC IND_CTA NIVEL COD_CTA NOME_CTA",
+    "C100": "REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER NUM_DOC CHV_NFE DT_DOC "
+            "DT_E_S VL_DOC:N2 IND_PGTO VL_DESC:N2 VL_ABAT_NT:N2 VL_MERC:N2 IND_FRT "
+            "VL_FRT:N2 VL_SEG:N2 VL_OUT_DA:N2 VL_BC_ICMS:N2 VL_ICMS:N2 VL_BC_ICMS_ST:N2 "
+            "VL_ICMS_ST:N2 VL_IPI:N2 VL_PIS:N2 VL_COFINS:N2 VL_PIS_ST:N2 VL_COFINS_ST:N2",
+    "C101": "REG VL_FCP_UF_DEST:N2 VL_ICMS_UF_DEST:N2 VL_ICMS_UF_REM:N2",
+    "C110": "REG COD_INF TXT_COMPL",
+    "C170": "REG NUM_ITEM COD_ITEM DESCR_COMPL QTD:N5 UNID VL_ITEM:N2 VL_DESC:N2 IND_MOV "
+            "CST_ICMS CFOP COD_NAT VL_BC_ICMS:N2 ALIQ_ICMS:N2 VL_ICMS:N2 VL_BC_ICMS_ST:N2 "
+            "ALIQ_ST:N2 VL_ICMS_ST:N2 IND_APUR CST_IPI COD_ENQ VL_BC_IPI:N2 ALIQ_IPI:N2 "
+            "VL_IPI:N2 CST_PIS VL_BC_PIS:N2 ALIQ_PIS:N4 QUANT_BC_PIS:N3 ALIQ_PIS_QUANT:N4 "
+            "VL_PIS:N2 CST_COFINS VL_BC_COFINS:N2 ALIQ_COFINS:N4 QUANT_BC_COFINS:N3 "
+            "ALIQ_COFINS_QUANT:N4 VL_COFINS:N2 COD_CTA VL_ABAT_NT:N2",
+    "C190": "REG CST_ICMS CFOP ALIQ_ICMS:N2 VL_OPR:N2 VL_BC_ICMS:N2 VL_ICMS:N2 "
+            "VL_BC_ICMS_ST:N2 VL_ICMS_ST:N2 VL_RED_BC:N2 VL_IPI:N2 COD_OBS",
+    "C195": "REG COD_OBS TXT_COMPL",
+    "C197": "REG COD_AJ DESCR_COMPL_AJ COD_ITEM VL_BC_ICMS:N2 ALIQ_ICMS:N2 VL_ICMS:N2 VL_OUTROS:N2",
+    "C500": "REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER SUB COD_CONS NUM_DOC DT_DOC "
+            "DT_E_S VL_DOC:N2 VL_DESC:N2 VL_FORN:N2 VL_SERV_NT:N2 VL_TERC:N2 VL_DA:N2 "
+            "VL_BC_ICMS:N2 VL_ICMS:N2 VL_BC_ICMS_ST:N2 VL_ICMS_ST:N2 COD_INF VL_PIS:N2 "
+            "VL_COFINS:N2 TP_LIGACAO COD_GRUPO_TENSAO",
+    "C590": "REG CST_ICMS CFOP ALIQ_ICMS:N2 VL_OPR:N2 VL_BC_ICMS:N2 VL_ICMS:N2 "
+            "VL_BC_ICMS_ST:N2 VL_ICMS_ST:N2 VL_RED_BC:N2 COD_OBS",
+    "D100": "REG IND_OPER IND_EMIT COD_PART COD_MOD COD_SIT SER SUB NUM_DOC CHV_CTE DT_DOC "
+            "DT_A_P TP_CT_E CHV_CTE_REF VL_DOC:N2 VL_DESC:N2 IND_FRT VL_SERV:N2 VL_BC_ICMS:N2 "
+            "VL_ICMS:N2 VL_NT:N2 COD_INF COD_CTA COD_MUN_ORIG COD_MUN_DEST",
+    "D190": "REG CST_ICMS CFOP ALIQ_ICMS:N2 VL_OPR:N2 VL_BC_ICMS:N2 VL_ICMS:N2 VL_RED_BC:N2 COD_OBS",
+    "E100": "REG DT_INI DT_FIN",
+    "E110": "REG VL_TOT_DEBITOS:N2 VL_AJ_DEBITOS:N2 VL_TOT_AJ_DEBITOS:N2 VL_ESTORNOS_CRED:N2 "
+            "VL_TOT_CREDITOS:N2 VL_AJ_CREDITOS:N2 VL_TOT_AJ_CREDITOS:N2 VL_ESTORNOS_DEB:N2 "
+            "VL_SLD_CREDOR_ANT:N2 VL_SLD_APURADO:N2 VL_TOT_DED:N2 VL_ICMS_RECOLHER:N2 "
+            "VL_SLD_CREDOR_TRANSPORTAR:N2 DEB_ESP:N2",
+    "E111": "REG COD_AJ_APUR DESCR_COMPL_AJ VL_AJ_APUR:N2",
+    "E116": "REG COD_OR VL_OR:N2 DT_VCTO COD_REC NUM_PROC IND_PROC PROC TXT_COMPL MES_REF",
+    "E200": "REG UF DT_INI DT_FIN",
+    "E300": "REG UF DT_INI DT_FIN",
+    "E500": "REG IND_APUR DT_INI DT_FIN",
+    "H005": "REG DT_INV VL_INV:N2 MOT_INV",
+    "H010": "REG COD_ITEM UNID QTD:N3 VL_UNIT:N6 VL_ITEM:N2 IND_PROP COD_PART TXT_COMPL "
+            "COD_CTA VL_ITEM_IR:N2",
+    "K200": "REG DT_EST COD_ITEM QTD:N3 IND_EST COD_PART",
+    "9900": "REG REG_BLC QTD_REG_BLC:N0",
+    "9999": "REG QTD_LIN:N0",
+}
+
+
+def _parse_layout(spec: str) -> Tuple[FieldLayout, ...]:
+    """Converte a descrição compacta de um registro em ``FieldLayout``."""
+    layout = []
+    for item in spec.split():
+        name, _, field_type = item.partition(":")
+        if field_type.startswith("N"):
+            layout.append(FieldLayout(name, "N", int(field_type[1:] or 0)))
+        else:
+            layout.append(FieldLayout(name))
+    return tuple(layout)
+
+
+# Carregado uma única vez, na importação do módulo
+RECORD_LAYOUTS: Dict[str, Tuple[FieldLayout, ...]] = {
+    record_type: _parse_layout(spec) for record_type, spec in _LAYOUT_SPECS.items()
+}
+
+
+def get_record_layout(record_type: str) -> Tuple[FieldLayout, ...]:
+    """Retorna o leiaute dos campos de um registro (vazio se desconhecido).
+    
+    Aberturas (X001) e encerramentos (X990) de bloco seguem o leiaute padrão.
+    """
+    layout = RECORD_LAYOUTS.get(record_type)
+    if layout is not None:
+        return layout
+    if record_type.endswith("001"):
+        return (FieldLayout("REG"), FieldLayout("IND_MOV"))
+    if record_type.endswith("990"):
+        return (FieldLayout("REG"), FieldLayout(f"QTD_LIN_{record_type[0]}", "N"))
+    return ()
+
+
+def get_field_name(record_type: str, index: int) -> str:
+    """Nome do campo pelo leiaute, ou ``Campo_<índice>`` se não houver."""
+    layout = get_record_layout(record_type)
+    return layout[index].name if index < len(layout) else f"Campo_{index}"
+
+
+@dataclass(frozen=True)
+class FieldPlan:
+    """Regras de comparação já resolvidas para um tipo de registro."""
+    indexes: Optional[Tuple[int, ...]] = None
+    ignored: FrozenSet[int] = frozenset()
+    numeric: FrozenSet[int] = frozenset()
+    tolerance: float = 0.0
+
+
+@dataclass(frozen=True)
+class FieldComparisonRules:
+    """Regras da comparação campo a campo, baseadas no leiaute dos registros.
+    
+    ``ignored_fields`` lista campos que nunca são comparados, como "DT_E_S"
+    (em qualquer registro) ou "C100.DT_E_S" (apenas no C100).
+    ``relevant_fields`` restringe, por registro, os campos comparados
+    (ex.: ``{"C170": ("VL_ITEM", "VL_ICMS")}``). Por padrão os campos são
+    comparados pelo texto exato; a comparação numérica precisa ser ativada
+    com ``numeric=True``, e então os campos numéricos do leiaute são
+    comparados como números, com a tolerância absoluta ``numeric_tolerance``
+    ("1,50" e "1,5" são iguais).
+    
+    As regras são imutáveis (``relevant_fields`` é guardado como tupla de
+    pares) e podem ser enviadas para outros processos.
+    """
+    numeric: bool = False
+    numeric_tolerance: float = 0.0
+    ignored_fields: Tuple[str, ...] = ()
+    relevant_fields: Union[Mapping[str, Tuple[str, ...]],
+                           Tuple[Tuple[str, Tuple[str, ...]], ...]] = ()
+    
+    def __post_init__(self):
+        relevant = self.relevant_fields
+        if isinstance(relevant, Mapping):
+            relevant = relevant.items()
+        object.__setattr__(self, "ignored_fields", tuple(self.ignored_fields))
+        object.__setattr__(self, "relevant_fields",
+                           tuple(sorted((record_type, tuple(names)) for record_type, names in relevant)))
+    
+    def get_field_plan(self, record_type: str) -> FieldPlan:
+        """Resolve as regras para os índices de campo de um tipo de registro."""
+        layout = get_record_layout(record_type)
+        positions = {field_layout.name: i for i, field_layout in enumerate(layout)}
+        
+        ignored = set()
+        for name in self.ignored_fields:
+            register, _, field_name = name.rpartition(".")
+            if register in ("", record_type) and field_name in positions:
+                ignored.add(positions[field_name])
+        
+        indexes = None
+        relevant = dict(self.relevant_fields)
+        if record_type in relevant:
+            indexes = tuple(sorted(positions[name] for name in relevant[record_type]
+                                   if name in positions))
+        
+        numeric = frozenset()
+        if self.numeric:
+            numeric = frozenset(i for i, field_layout in enumerate(layout) if field_layout.type == "N")
+        
+        return FieldPlan(indexes, frozenset(ignored), numeric, self.numeric_tolerance)
+
+
+def numbers_equal(value1: str, value2: str, tolerance: float) -> bool:
+    """Compara dois valores numéricos no formato SPED (vírgula decimal).
+    
+    A diferença exata (sem arredondamento) é comparada com a tolerância.
+    Campo vazio não é tratado como zero: só é igual a outro campo vazio.
+    """
+    if not value1 or not value2:
+        return value1 == value2
+    try:
+        difference = abs(Decimal(value1.replace(",", ".")) - Decimal(value2.replace(",", ".")))
+    except InvalidOperation:
+        return False
+    return difference.is_finite() and difference <= Decimal(str(tolerance))
@@ -2,17 +2,29 @@
 Módulo para geração de relatórios de comparação SPED.
 """
 
-from typing import List, Dict
+import itertools
+import re
+import shutil
+import tempfile
+from typing import Callable, Iterable, Optional
 from datetime import datetime
 from pathlib import Path
-from sped_comparator import SpedComparator, RecordDifference, DifferenceType, FieldDifference
+from sped_comparator import SpedComparator, RecordDifference, DifferenceType
+from sped_parser import PROGRESS_INTERVAL
 
 
 class SpedReportGenerator:
-    """Gerador de relatórios para comparação de arquivos SPED."""
+    """Gerador de relatórios para comparação de arquivos SPED.
     
-    def __init__(self, comparator: SpedComparator):
+    O callback ``progress(escritas, total)`` é chamado a cada
+    ``PROGRESS_INTERVAL`` diferenças escritas nos relatórios HTML; se lançar
+    ``SpedOperationCancelled`` a geração é interrompida.
+    """
+    
+    def __init__(self, comparator: SpedComparator,
+                 progress: Optional[Callable[[int, int], None]] = None):
         self.comparator = comparator
+        self.progress = progress
         
     def generate_console_report(self) -> None:
         """Gera relatório no console."""
@@ -49,26 +61,7 @@ class SpedReportGenerator:
         """Imprime estatísticas por tipo de registro."""
         print(f"\n--- ESTATÍSTICAS POR TIPO DE REGISTRO ---")
         
-        # Agrupar diferenças por tipo de registro
-        diff_by_type = {}
-        for diff in self.comparator.differences:
-            record_type = diff.record_type
-            if record_type not in diff_by_type:
-                diff_by_type[record_type] = {
-                    'added': 0,
-                    'removed': 0,
-                    'modified': 0,
-                    'total': 0
-                }
-            
-            diff_by_type[record_type]['total'] += 1
-            
-            if diff.difference_type == DifferenceType.RECORD_ADDED:
-                diff_by_type[record_type]['added'] += 1
-            elif diff.difference_type == DifferenceType.RECORD_REMOVED:
-                diff_by_type[record_type]['removed'] += 1
-            elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
-                diff_by_type[record_type]['modified'] += 1
+        diff_by_type = self.comparator.get_statistics_by_type()
         
         # Imprimir tabela
         print(f"{'Tipo':^8} | {'Total':^6} | {'Adicionados':^11} | {'Removidos':^9} | {'Modificados':^11}")
@@ -86,51 +79,141 @@ class SpedReportGenerator:
             # Cabeçalho por tipo de registro
             if diff.record_type != current_type:
                 current_type = diff.record_type
-                print(f"\n📋 REGISTRO {current_type}:")
-                print("-" * 50)
+                self._print_record_type_header(current_type)
             
-            # Imprimir diferença
-            if diff.difference_type == DifferenceType.RECORD_ADDED:
-                print(f"  ➕ ADICIONADO (Linha {diff.line_number_file2}):")
-                print(f"     {diff.record_file2.raw_line}")
-                
-            elif diff.difference_type == DifferenceType.RECORD_REMOVED:
-                print(f"  ➖ REMOVIDO (Linha {diff.line_number_file1}):")
-                print(f"     {diff.record_file1.raw_line}")
-                
-            elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
-                print(f"  🔄 MODIFICADO (Linha {diff.line_number_file1} -> {diff.line_number_file2}):")
-                print(f"     Arquivo 1: {diff.record_file1.raw_line}")
-                print(f"     Arquivo 2: {diff.record_file2.raw_line}")
-                
-                # Mostrar campos alterados
-                if diff.field_differences:
-                    print("     Campos alterados:")
-                    for field_diff in diff.field_differences:
-                        print(f"       • Campo {field_diff.field_index}: '{field_diff.old_value}' -> '{field_diff.new_value}'")
+            self._print_difference(diff)
+    
+    def generate_streaming_console_report(self) -> None:
+        """Executa a comparação imprimindo cada diferença assim que é encontrada.
+        
+        As diferenças não ficam acumuladas no comparador; o resumo é
+        impresso ao final.
+        """
+        print("\n" + "="*80)
+        print("RELATÓRIO DE COMPARAÇÃO SPED FISCAL")
+        print("="*80)
+        
+        print(f"\nArquivo 1: {Path(self.comparator.file1_path).name}")
+        print(f"Arquivo 2: {Path(self.comparator.file2_path).name}")
+        print(f"Data da comparação: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+        
+        print(f"\n--- DETALHES DAS DIFERENÇAS ---")
+        current_type = None
+        
+        for diff in self.comparator.iter_differences():
+            if diff.record_type != current_type:
+                current_type = diff.record_type
+                self._print_record_type_header(current_type)
             
-            print()
+            self._print_difference(diff)
+        
+        summary = self.comparator.get_summary()
+        print(f"\n--- RESUMO GERAL ---")
+        print(f"Total de diferenças encontradas: {summary['total_differences']}")
+        print(f"Registros adicionados: {summary['records_added']}")
+        print(f"Registros removidos: {summary['records_removed']}")
+        print(f"Registros modificados: {summary['records_modified']}")
+        
+        if summary['total_differences'] == 0:
+            print("\n✅ Os arquivos são idênticos!")
+        
+        print("\n" + "="*80)
+    
+    def _print_record_type_header(self, record_type: str) -> None:
+        """Imprime o cabeçalho de um tipo de registro."""
+        print(f"\n📋 REGISTRO {record_type}:")
+        print("-" * 50)
+    
+    def _print_difference(self, diff: RecordDifference) -> None:
+        """Imprime uma diferença."""
+        if diff.difference_type == DifferenceType.RECORD_ADDED:
+            print(f"  ➕ ADICIONADO (Linha {diff.line_number_file2}):")
+            print(f"     {diff.record_file2.raw_line}")
+            
+        elif diff.difference_type == DifferenceType.RECORD_REMOVED:
+            print(f"  ➖ REMOVIDO (Linha {diff.line_number_file1}):")
+            print(f"     {diff.record_file1.raw_line}")
+            
+        elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
+            print(f"  🔄 MODIFICADO (Linha {diff.line_number_file1} -> {diff.line_number_file2}):")
+            print(f"     Arquivo 1: {diff.record_file1.raw_line}")
+            print(f"     Arquivo 2: {diff.record_file2.raw_line}")
+            
+            # Mostrar campos alterados
+            if diff.field_differences:
+                print("     Campos alterados:")
+                for field_diff in diff.field_differences:
+                    print(f"       • Campo {field_diff.field_index} ({field_diff.field_name}): '{field_diff.old_value}' -> '{field_diff.new_value}'")
+        
+        print()
+    
+    # Tamanho do buffer de escrita do relatório HTML
+    HTML_BUFFER_SIZE = 1024 * 1024
     
     def generate_html_report(self, output_file: str) -> None:
-        """Gera relatório em HTML."""
-        html_content = self._generate_html_content()
+        """Gera relatório em HTML.
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        O conteúdo é escrito no arquivo à medida que é gerado (escrita
+        bufferizada), sem montar o relatório inteiro em memória. Se
+        ``compare()`` ainda não foi chamado, as diferenças são consumidas de
+        ``iter_differences()`` em uma única passada: os detalhes vão para um
+        arquivo temporário e são copiados depois do resumo, que só é
+        conhecido no fim. Só as diferenças de um tipo de registro ficam em
+        memória de cada vez (para ordená-las pela linha).
+        """
+        try:
+            with open(output_file, 'w', encoding='utf-8', buffering=self.HTML_BUFFER_SIZE) as f:
+                if self.comparator.compared:
+                    self._write_html(f)
+                else:
+                    self._write_streaming_html(f)
+        except BaseException:
+            # Interrompido (por exemplo, cancelado): não deixar um relatório pela metade
+            Path(output_file).unlink(missing_ok=True)
+            raise
         
         print(f"Relatório HTML gerado: {output_file}")
     
-    def _generate_html_content(self) -> str:
-        """Gera o conteúdo HTML do relatório."""
+    def _write_html(self, stream) -> None:
+        """Escreve o relatório HTML completo em um arquivo aberto."""
         summary = self.comparator.get_summary()
         
-        html = f"""
+        self._write_html_head(stream, "Relatório de Comparação SPED Fiscal")
+        self._write_html_summary(stream)
+        
+        if summary['total_differences'] == 0:
+            stream.write("<div class='summary'><h2>✅ Os arquivos são idênticos!</h2></div>")
+        else:
+            self._write_html_details(stream, self.comparator.differences, summary['total_differences'])
+        
+        self._write_html_footer(stream)
+    
+    def _write_streaming_html(self, stream) -> None:
+        """Escreve o relatório HTML comparando os arquivos em fluxo (``iter_differences()``)."""
+        with tempfile.TemporaryFile('w+', encoding='utf-8', buffering=self.HTML_BUFFER_SIZE) as details:
+            self._write_html_details(details, self.comparator.iter_differences())
+            summary = self.comparator.get_summary()
+            
+            self._write_html_head(stream, "Relatório de Comparação SPED Fiscal")
+            self._write_html_summary(stream)
+            
+            if summary['total_differences'] == 0:
+                stream.write("<div class='summary'><h2>✅ Os arquivos são idênticos!</h2></div>")
+            else:
+                details.seek(0)
+                shutil.copyfileobj(details, stream, self.HTML_BUFFER_SIZE)
+        
+        self._write_html_footer(stream)
+    
+    def _write_html_head(self, stream, title: str) -> None:
+        """Escreve o início do documento HTML (cabeçalho e estilos)."""
+        stream.write(f"""
 <!DOCTYPE html>
 <html lang="pt-BR">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Relatório de Comparação SPED Fiscal</title>
+    <title>{title}</title>
     <style>
         body {{ font-family: Arial, sans-serif; margin: 20px; }}
         .header {{ background-color: #f0f8ff; padding: 20px; border-radius: 5px; }}
@@ -145,9 +228,18 @@ class SpedReportGenerator:
         th, td {{ border: 1px solid #ddd; padding: 8px; text-align: center; }}
         th {{ background-color: #f2f2f2; }}
         .code {{ font-family: monospace; background-color: #f5f5f5; padding: 5px; }}
+        .pagination {{ margin: 15px 0; }}
+        .pagination a {{ margin-right: 10px; }}
     </style>
 </head>
 <body>
+""")
+    
+    def _write_html_summary(self, stream) -> None:
+        """Escreve a identificação dos arquivos e o resumo geral."""
+        summary = self.comparator.get_summary()
+        
+        stream.write(f"""
     <div class="header">
         <h1>Relatório de Comparação SPED Fiscal</h1>
         <p><strong>Arquivo 1:</strong> {Path(self.comparator.file1_path).name}</p>
@@ -162,66 +254,162 @@ class SpedReportGenerator:
         <p><strong>Registros removidos:</strong> {summary['records_removed']}</p>
         <p><strong>Registros modificados:</strong> {summary['records_modified']}</p>
     </div>
-        """
-        
-        if summary['total_differences'] == 0:
-            html += "<div class='summary'><h2>✅ Os arquivos são idênticos!</h2></div>"
-        else:
-            html += self._generate_html_details()
-        
-        html += """
+        """)
+    
+    def _write_html_footer(self, stream) -> None:
+        """Escreve o fim do documento HTML."""
+        stream.write("""
 </body>
 </html>
+        """)
+    
+    def generate_paginated_html_report(self, output_dir: str, page_size: int = 1000) -> Path:
+        """Gera o relatório HTML dividido em páginas.
+        
+        Cria em ``output_dir`` uma página inicial leve (``index.html``) com o
+        resumo e a contagem por tipo de registro, com links para páginas de
+        detalhes de cada tipo contendo até ``page_size`` diferenças cada.
+        Retorna o caminho da página inicial.
+        
+        As páginas de detalhes usam o índice por tipo montado por
+        ``compare()``; depois de apenas ``iter_differences()`` só os
+        contadores estariam disponíveis, por isso é exigido um ``compare()``.
         """
+        if not self.comparator.compared:
+            raise RuntimeError("O relatório HTML paginado requer a comparação completa: execute compare() antes")
+        
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        statistics = self.comparator.get_statistics_by_type()
+        page_counts = {}
+        total = self.comparator.get_summary()['total_differences']
+        written = 0
         
-        return html
+        for record_type in sorted(statistics):
+            differences = sorted(self.comparator.get_differences_by_type(record_type),
+                                 key=lambda x: x.line_number_file1 or x.line_number_file2 or 0)
+            page_counts[record_type] = max(1, -(-len(differences) // page_size))
+            
+            for page in range(1, page_counts[record_type] + 1):
+                page_path = output_dir / self._page_file_name(record_type, page)
+                with open(page_path, 'w', encoding='utf-8', buffering=self.HTML_BUFFER_SIZE) as f:
+                    self._write_html_head(f, f"Registro {record_type} - página {page}")
+                    navigation = self._format_html_navigation(record_type, page, page_counts[record_type])
+                    f.write(navigation)
+                    f.write(f"<div class='record-type'>📋 REGISTRO {record_type} "
+                            f"(página {page} de {page_counts[record_type]})</div>\n")
+                    
+                    for diff in differences[(page - 1) * page_size:page * page_size]:
+                        f.write(self._format_html_difference(diff))
+                        written += 1
+                        self._report_progress(written, total)
+                        
+                    f.write(navigation)
+                    self._write_html_footer(f)
+        
+        index_path = output_dir / "index.html"
+        with open(index_path, 'w', encoding='utf-8') as f:
+            self._write_html_head(f, "Relatório de Comparação SPED Fiscal")
+            self._write_html_summary(f)
+            
+            if not statistics:
+                f.write("<div class='summary'><h2>✅ Os arquivos são idênticos!</h2></div>")
+            else:
+                f.write("<h2>Diferenças por Tipo de Registro</h2>\n<table>\n")
+                f.write("<tr><th>Tipo</th><th>Total</th><th>Adicionados</th>"
+                        "<th>Removidos</th><th>Modificados</th><th>Páginas</th></tr>\n")
+                for record_type in sorted(statistics):
+                    stats = statistics[record_type]
+                    links = " ".join(
+                        f"<a href='{self._page_file_name(record_type, page)}'>{page}</a>"
+                        for page in range(1, page_counts[record_type] + 1)
+                    )
+                    f.write(f"<tr><td>{record_type}</td><td>{stats['total']}</td><td>{stats['added']}</td>"
+                            f"<td>{stats['removed']}</td><td>{stats['modified']}</td><td>{links}</td></tr>\n")
+                f.write("</table>\n")
+            
+            self._write_html_footer(f)
+        
+        print(f"Relatório HTML paginado gerado: {index_path}")
+        return index_path
     
-    def _generate_html_details(self) -> str:
-        """Gera os detalhes em HTML."""
-        html = "<h2>Detalhes das Diferenças</h2>\n"
+    def _page_file_name(self, record_type: str, page: int) -> str:
+        """Nome do arquivo de uma página de detalhes."""
+        safe_type = re.sub(r'[^A-Za-z0-9]', '_', record_type)
+        return f"registro_{safe_type}_{page:04d}.html"
+    
+    def _format_html_navigation(self, record_type: str, page: int, page_count: int) -> str:
+        """Links de navegação entre as páginas de um tipo de registro."""
+        links = ["<a href='index.html'>🏠 Índice</a>"]
+        if page > 1:
+            links.append(f"<a href='{self._page_file_name(record_type, page - 1)}'>◀ Anterior</a>")
+        if page < page_count:
+            links.append(f"<a href='{self._page_file_name(record_type, page + 1)}'>Próxima ▶</a>")
+        return f"<div class='pagination'>{' '.join(links)}</div>\n"
+    
+    def _write_html_details(self, stream, differences: Iterable[RecordDifference], total: int = 0) -> None:
+        """Escreve os detalhes em HTML, uma diferença por vez.
         
-        current_type = None
+        As diferenças chegam agrupadas por tipo de registro, em ordem; cada
+        grupo é ordenado pela linha. ``total`` (0 se desconhecido) é repassado
+        ao callback de progresso.
+        """
+        stream.write("<h2>Detalhes das Diferenças</h2>\n")
         
-        for diff in sorted(self.comparator.differences, key=lambda x: (x.record_type, x.line_number_file1 or x.line_number_file2 or 0)):
-            if diff.record_type != current_type:
-                current_type = diff.record_type
-                html += f"<div class='record-type'>📋 REGISTRO {current_type}</div>\n"
+        written = 0
+        for record_type, group in itertools.groupby(differences, key=lambda x: x.record_type):
+            stream.write(f"<div class='record-type'>📋 REGISTRO {record_type}</div>\n")
+            
+            for diff in sorted(group, key=lambda x: x.line_number_file1 or x.line_number_file2 or 0):
+                stream.write(self._format_html_difference(diff))
+                written += 1
+                self._report_progress(written, total)
+    
+    def _report_progress(self, written: int, total: int) -> None:
+        """Repassa ao callback o número de diferenças escritas, a cada ``PROGRESS_INTERVAL``."""
+        if self.progress is not None and (written % PROGRESS_INTERVAL == 0 or written == total):
+            self.progress(written, total)
+    
+    def _format_html_difference(self, diff: RecordDifference) -> str:
+        """Formata uma diferença como bloco HTML."""
+        css_class = ""
+        icon = ""
+        title = ""
+        content = ""
+        
+        if diff.difference_type == DifferenceType.RECORD_ADDED:
+            css_class = "added"
+            icon = "➕"
+            title = f"ADICIONADO (Linha {diff.line_number_file2})"
+            content = f"<div class='code'>{diff.record_file2.raw_line}</div>"
             
-            css_class = ""
-            icon = ""
+        elif diff.difference_type == DifferenceType.RECORD_REMOVED:
+            css_class = "removed"
+            icon = "➖"
+            title = f"REMOVIDO (Linha {diff.line_number_file1})"
+            content = f"<div class='code'>{diff.record_file1.raw_line}</div>"
             
-            if diff.difference_type == DifferenceType.RECORD_ADDED:
-                css_class = "added"
-                icon = "➕"
-                title = f"ADICIONADO (Linha {diff.line_number_file2})"
-                content = f"<div class='code'>{diff.record_file2.raw_line}</div>"
-                
-            elif diff.difference_type == DifferenceType.RECORD_REMOVED:
-                css_class = "removed"
-                icon = "➖"
-                title = f"REMOVIDO (Linha {diff.line_number_file1})"
-                content = f"<div class='code'>{diff.record_file1.raw_line}</div>"
-                
-            elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
-                css_class = "modified"
-                icon = "🔄"
-                title = f"MODIFICADO (Linha {diff.line_number_file1} -> {diff.line_number_file2})"
-                content = f"""
-                <div class='code'>Arquivo 1: {diff.record_file1.raw_line}</div>
-                <div class='code'>Arquivo 2: {diff.record_file2.raw_line}</div>
-                """
-                
-                if diff.field_differences:
-                    content += "<div class='field-changes'><strong>Campos alterados:</strong><ul>"
-                    for field_diff in diff.field_differences:
-                        content += f"<li>Campo {field_diff.field_index}: '{field_diff.old_value}' -> '{field_diff.new_value}'</li>"
-                    content += "</ul></div>"
+        elif diff.difference_type == DifferenceType.RECORD_MODIFIED:
+            css_class = "modified"
+            icon = "🔄"
+            title = f"MODIFICADO (Linha {diff.line_number_file1} -> {diff.line_number_file2})"
+            content = f"""
+            <div class='code'>Arquivo 1: {diff.record_file1.raw_line}</div>
+            <div class='code'>Arquivo 2: {diff.record_file2.raw_line}</div>
+            """
             
-            html += f"""
+            if diff.field_differences:
+                content += "<div class='field-changes'><strong>Campos alterados:</strong><ul>"
+                content += "".join(
+                    f"<li>Campo {field_diff.field_index} ({field_diff.field_name}): '{field_diff.old_value}' -> '{field_diff.new_value}'</li>"
+                    for field_diff in diff.field_differences
+                )
+                content += "</ul></div>"
+        
+        return f"""
             <div class="difference {css_class}">
                 <strong>{icon} {title}</strong>
                 {content}
             </div>
-            """
-        
-        return html
\ No newline at end of file
+            """
\ No newline at end of file
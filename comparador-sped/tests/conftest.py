@@ -0,0 +1,35 @@
+"""Configuração dos testes do comparador SPED."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def write_sped(tmp_path):
+    """Grava um arquivo SPED em ``tmp_path`` a partir das linhas (listas de campos)."""
+    def write(name, records):
+        path = tmp_path / name
+        path.write_text("".join("|" + "|".join(fields) + "|\n" for fields in records), encoding="utf-8")
+        return path
+    return write
+
+
+def sped_records(values, removed=()):
+    """Registros de um EFD pequeno: um C100 por valor, cada um com um C170 e um C190.
+    
+    Os documentos de ``removed`` (índices) ficam de fora.
+    """
+    records = [["0000", "017", "0", "01012024", "31012024", "EMPRESA", "12345678000199", "", "SP"]]
+    for number, value in enumerate(values):
+        if number in removed:
+            continue
+        records.append(["C100", "0", "1", f"P{number}", "55", "00", "1", str(number), f"chave{number}",
+                        "01012024", "01012024", value, "0", "0,00", "0,00"])
+        records.append(["C170", "1", f"ITEM{number}", "desc", "1", "UN", value, "0", "0", "000", "5102"])
+        records.append(["C190", "000", "5102", "18,00", value, "0", "0", "0", "0", "0"])
+    records.append(["9999", str(len(records) + 1)])
+    return records
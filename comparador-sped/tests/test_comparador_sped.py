@@ -0,0 +1,73 @@
+"""Testes da linha de comando."""
+
+import csv
+
+import pytest
+
+from comparador_sped import EXIT_DIFFERENCES, EXIT_ERROR, EXIT_IDENTICAL, main, match_directories
+from conftest import sped_records
+
+
+VALUES = ["10,00", "20,00", "30,00"]
+
+
+def write(path, records):
+    """Grava um arquivo SPED a partir das linhas (listas de campos)."""
+    path.write_text("".join("|" + "|".join(fields) + "|\n" for fields in records), encoding="utf-8")
+
+
+@pytest.fixture
+def directories(tmp_path):
+    """Dois diretórios com um par idêntico, um par diferente e um arquivo sem par."""
+    dir1, dir2 = tmp_path / "antes", tmp_path / "depois"
+    dir1.mkdir()
+    dir2.mkdir()
+    
+    write(dir1 / "igual.txt", sped_records(VALUES))
+    write(dir2 / "igual.txt", sped_records(VALUES))
+    write(dir1 / "diferente.txt", sped_records(VALUES))
+    write(dir2 / "diferente.txt", sped_records(VALUES, removed={0}))
+    write(dir1 / "sozinho.txt", sped_records(VALUES))
+    return dir1, dir2
+
+
+@pytest.mark.parametrize("backend", ["memory", "mmap"])
+def test_exit_code_reports_whether_files_differ(write_sped, backend):
+    file1 = write_sped("a.txt", sped_records(VALUES))
+    file2 = write_sped("b.txt", sped_records(VALUES))
+    file3 = write_sped("c.txt", sped_records(VALUES, removed={1}))
+    
+    assert main([str(file1), str(file2), "--backend", backend, "--jobs", "1"]) == EXIT_IDENTICAL
+    assert main([str(file1), str(file3), "--backend", backend, "--jobs", "1"]) == EXIT_DIFFERENCES
+    assert main([str(file1), str(file3.parent / "inexistente.txt")]) == EXIT_ERROR
+
+
+def test_directories_are_compared_pair_by_pair(directories, tmp_path):
+    dir1, dir2 = directories
+    output_dir = tmp_path / "saida"
+    
+    exit_code = main([str(dir1), str(dir2), "--jobs", "2", "--output-dir", str(output_dir), "--format", "jsonl"])
+    
+    assert exit_code == EXIT_DIFFERENCES
+    with open(output_dir / "resumo.csv", encoding="utf-8", newline="") as f:
+        summary = {row["file1"].rsplit("/", 1)[-1]: row for row in csv.DictReader(f)}
+    assert set(summary) == {"diferente.txt", "igual.txt"}
+    assert summary["igual.txt"]["total_differences"] == "0"
+    assert int(summary["diferente.txt"]["records_removed"]) == 3
+    assert (output_dir / "diferente.jsonl").exists()
+
+
+def test_directories_match_by_header(tmp_path):
+    dir1, dir2 = tmp_path / "antes", tmp_path / "depois"
+    dir1.mkdir()
+    dir2.mkdir()
+    for directory, names in ((dir1, ("a.txt", "b.txt")), (dir2, ("y.txt", "x.txt"))):
+        for name, cnpj in zip(names, ("11111111000111", "22222222000122")):
+            records = sped_records(VALUES)
+            records[0][6] = cnpj
+            write(directory / name, records)
+    
+    assert match_directories(dir1, dir2, "name") == ([], [dir1 / "a.txt", dir1 / "b.txt",
+                                                         dir2 / "x.txt", dir2 / "y.txt"])
+    assert match_directories(dir1, dir2, "header") == ([(dir1 / "a.txt", dir2 / "y.txt"),
+                                                        (dir1 / "b.txt", dir2 / "x.txt")], [])
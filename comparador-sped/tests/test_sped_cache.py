@@ -0,0 +1,39 @@
+"""Testes dos caches em disco do parsing e dos resultados."""
+
+from conftest import sped_records
+from sped_cache import SpedParseCache
+from sped_parser import SpedFileIndex, SpedParser
+
+
+def test_parse_cache_reuses_index_until_the_file_changes(write_sped, tmp_path, monkeypatch):
+    path = write_sped("efd.txt", sped_records(["10,00", "20,00"]))
+    cache = SpedParseCache(str(tmp_path / "cache"))
+    
+    first = SpedParser(str(path), backend="mmap", cache=cache)
+    first.parse_file()
+    expected = [record.raw_line for record in first.records]
+    first.close()
+    
+    # Arquivo inalterado: o índice vem do cache, sem novo parsing
+    with monkeypatch.context() as patch:
+        patch.setattr(SpedFileIndex, "build", lambda *args: (_ for _ in ()).throw(AssertionError("reparsing")))
+        cached = SpedParser(str(path), backend="mmap", cache=cache)
+        cached.parse_file()
+        assert [record.raw_line for record in cached.records] == expected
+        cached.close()
+    
+    write_sped("efd.txt", sped_records(["10,00", "20,00", "30,00"]))
+    changed = SpedParser(str(path), backend="mmap", cache=cache)
+    changed.parse_file()
+    assert changed.get_total_records() == len(expected) + 3
+    changed.close()
+
+
+def test_parse_cache_evicts_entries_above_the_limit(write_sped, tmp_path):
+    cache = SpedParseCache(str(tmp_path / "cache"), max_bytes=1)
+    for name in ("a.txt", "b.txt"):
+        parser = SpedParser(str(write_sped(name, sped_records([name]))), backend="mmap", cache=cache)
+        parser.parse_file()
+        parser.close()
+    
+    assert list(cache.cache_dir.glob(f"*{SpedParseCache.ENTRY_SUFFIX}")) == []
@@ -0,0 +1,181 @@
+"""Testes do comparador SPED."""
+
+from collections import Counter
+
+import pytest
+
+from conftest import sped_records
+from sped_cache import SpedResultCache
+from sped_comparator import DifferenceType, SpedComparator
+from sped_layout import FieldComparisonRules
+
+
+VALUES = [f"{value},00" for value in range(10, 60, 10)]
+
+
+def _differences(differences):
+    """Diferenças em forma comparável: tipo, linhas e campos alterados."""
+    return [
+        (difference.record_type, difference.difference_type, difference.line_number_file1,
+         difference.line_number_file2, [(field.field_index, field.old_value, field.new_value)
+                                        for field in difference.field_differences])
+        for difference in differences
+    ]
+
+
+def _changed_pair(write_sped):
+    """Par de arquivos com diferenças em vários tipos: cabeçalho, valores e documento removido."""
+    changed = list(VALUES)
+    changed[3] = "41,00"
+    records1 = sped_records(VALUES)
+    records2 = sped_records(changed, removed={1})
+    records2[0][5] = "OUTRA EMPRESA"
+    return write_sped("a.txt", records1), write_sped("b.txt", records2)
+
+
+def test_semantic_keys_match_records_after_a_removed_document(write_sped):
+    file1 = write_sped("a.txt", sped_records(VALUES))
+    file2 = write_sped("b.txt", sped_records(VALUES, removed={1}))
+    
+    comparator = SpedComparator(str(file1), str(file2))
+    comparator.compare()
+    
+    counts = Counter((d.record_type, d.difference_type) for d in comparator.differences)
+    assert counts == {
+        ("C100", DifferenceType.RECORD_REMOVED): 1,
+        ("C170", DifferenceType.RECORD_REMOVED): 1,
+        ("C190", DifferenceType.RECORD_REMOVED): 1,
+        ("9999", DifferenceType.RECORD_MODIFIED): 1,
+    }
+
+
+@pytest.fixture
+def prepared_types(monkeypatch):
+    """Tipos de registro cujos registros foram reunidos para comparação."""
+    prepared = []
+    prepare = SpedComparator._prepare_type_job
+    
+    def record(self, record_type, *args, **kwargs):
+        prepared.append(record_type)
+        return prepare(self, record_type, *args, **kwargs)
+    
+    monkeypatch.setattr(SpedComparator, "_prepare_type_job", record)
+    return prepared
+
+
+def test_identical_files_are_not_compared_record_by_record(write_sped, prepared_types):
+    file1 = write_sped("a.txt", sped_records(VALUES))
+    file2 = write_sped("b.txt", sped_records(VALUES))
+    
+    assert SpedComparator(str(file1), str(file2)).compare() == []
+    assert prepared_types == []
+
+
+def test_only_changed_blocks_are_compared(write_sped, prepared_types):
+    changed = list(VALUES)
+    changed[2] = "31,00"
+    file1 = write_sped("a.txt", sped_records(VALUES))
+    file2 = write_sped("b.txt", sped_records(changed))
+    
+    comparator = SpedComparator(str(file1), str(file2))
+    comparator.compare()
+    
+    assert sorted(prepared_types) == ["C100", "C170", "C190"]
+    assert {d.record_type for d in comparator.differences} == {"C100", "C170", "C190"}
+    assert all(d.difference_type == DifferenceType.RECORD_MODIFIED for d in comparator.differences)
+
+
+@pytest.mark.parametrize("backend", ["memory", "mmap"])
+@pytest.mark.parametrize("executor", SpedComparator.EXECUTORS)
+def test_parallel_comparison_matches_sequential(write_sped, backend, executor):
+    file1, file2 = _changed_pair(write_sped)
+    sequential = SpedComparator(str(file1), str(file2), backend=backend)
+    sequential.compare()
+    
+    parallel = SpedComparator(str(file1), str(file2), backend=backend, workers=2, executor=executor)
+    parallel.compare()
+    
+    assert _differences(parallel.differences) == _differences(sequential.differences)
+    assert {d.record_type for d in sequential.differences} == {"0000", "C100", "C170", "C190", "9999"}
+
+
+def test_streaming_matches_compare(write_sped):
+    file1, file2 = _changed_pair(write_sped)
+    comparator = SpedComparator(str(file1), str(file2))
+    compared = _differences(comparator.compare())
+    
+    streamed = _differences(comparator.iter_differences())
+    
+    assert streamed == compared
+    assert comparator.differences == []
+    assert comparator.get_differences_by_type("C100") == []
+    assert not comparator.compared
+
+
+def test_counters_match_the_differences(write_sped):
+    file1, file2 = _changed_pair(write_sped)
+    comparator = SpedComparator(str(file1), str(file2))
+    differences = comparator.compare()
+    summary = comparator.get_summary()
+    statistics = comparator.get_statistics_by_type()
+    
+    counts = Counter(difference.difference_type for difference in differences)
+    assert summary == {
+        "total_differences": len(differences),
+        "records_added": counts[DifferenceType.RECORD_ADDED],
+        "records_removed": counts[DifferenceType.RECORD_REMOVED],
+        "records_modified": counts[DifferenceType.RECORD_MODIFIED],
+    }
+    for record_type, type_counts in statistics.items():
+        assert type_counts["total"] == len(comparator.get_differences_by_type(record_type))
+    
+    # O fluxo mantém os mesmos contadores sem guardar as diferenças
+    for _ in comparator.iter_differences():
+        pass
+    assert comparator.get_summary() == summary
+    assert comparator.get_statistics_by_type() == statistics
+
+
+def test_result_cache_reuses_unchanged_blocks(write_sped, prepared_types, tmp_path):
+    result_cache = SpedResultCache(str(tmp_path / "resultados"))
+    file1, file2 = _changed_pair(write_sped)
+    first = SpedComparator(str(file1), str(file2), result_cache=result_cache)
+    first.compare()
+    
+    # Mesmo par sem mudanças: nenhum tipo é comparado de novo
+    prepared_types.clear()
+    again = SpedComparator(str(file1), str(file2), result_cache=result_cache)
+    again.compare()
+    assert prepared_types == []
+    assert _differences(again.differences) == _differences(first.differences)
+    
+    # Só o bloco C mudou: o bloco 0 reaproveita o resultado anterior
+    records2 = sped_records(["10,00", "20,00", "30,00", "41,00", "55,00"], removed={1})
+    records2[0][5] = "OUTRA EMPRESA"
+    write_sped("b.txt", records2)
+    prepared_types.clear()
+    changed = SpedComparator(str(file1), str(file2), result_cache=result_cache)
+    changed.compare()
+    assert "0000" not in prepared_types and "C100" in prepared_types
+    
+    fresh = SpedComparator(str(file1), str(file2))
+    fresh.compare()
+    assert _differences(changed.differences) == _differences(fresh.differences)
+
+
+def test_rules_ignore_fields_and_numeric_tolerance(write_sped):
+    records2 = sped_records([value.replace(",00", ",001") for value in VALUES])
+    for fields in records2:
+        if fields[0] == "C100":
+            fields[10] = "02012024"
+    file1 = write_sped("a.txt", sped_records(VALUES))
+    file2 = write_sped("b.txt", records2)
+    
+    exact = SpedComparator(str(file1), str(file2))
+    exact.compare()
+    tolerant = SpedComparator(str(file1), str(file2), rules=FieldComparisonRules(
+        numeric=True, numeric_tolerance=0.01, ignored_fields=("C100.DT_E_S",)))
+    tolerant.compare()
+    
+    assert {d.record_type for d in exact.differences} == {"C100", "C170", "C190"}
+    assert tolerant.differences == []
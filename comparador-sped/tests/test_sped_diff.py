@@ -0,0 +1,73 @@
+"""Testes do alinhamento de sequências (sped_diff)."""
+
+import random
+
+import pytest
+
+import sped_diff
+from sped_diff import align_sequences
+
+
+def _lcs_length(seq1, seq2):
+    """Tamanho da maior subsequência comum, por programação dinâmica."""
+    previous = [0] * (len(seq2) + 1)
+    for item in seq1:
+        current = [0]
+        for j, other in enumerate(seq2):
+            current.append(previous[j] + 1 if item == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def _check_alignment(seq1, seq2, pairs):
+    """Confere que o alinhamento cobre cada índice uma vez, em ordem, e devolve os casamentos."""
+    assert sorted(i for i, _ in pairs if i is not None) == list(range(len(seq1)))
+    assert sorted(j for _, j in pairs if j is not None) == list(range(len(seq2)))
+    
+    matched = [(i, j) for i, j in pairs if i is not None and j is not None]
+    assert matched == sorted(matched)
+    assert all(j1 < j2 for (_, j1), (_, j2) in zip(matched, matched[1:]))
+    return [(i, j) for i, j in matched if seq1[i] == seq2[j]]
+
+
+def test_unique_insertions_and_removals_are_isolated():
+    seq1 = list(range(100))
+    seq2 = [value for value in seq1 if value not in (10, 50)] + [1000]
+    seq2.insert(30, 2000)
+    
+    pairs = align_sequences(seq1, seq2)
+    
+    assert len(_check_alignment(seq1, seq2, pairs)) == 98
+    assert (10, None) in pairs and (50, None) in pairs
+    assert (None, seq2.index(2000)) in pairs and (None, seq2.index(1000)) in pairs
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_repetitive_sequences_match_the_longest_common_subsequence(seed):
+    generator = random.Random(seed)
+    seq1 = [generator.choice("ab") for _ in range(60)]
+    seq2 = list(seq1)
+    for _ in range(8):
+        position = generator.randrange(len(seq2))
+        if generator.random() < 0.5:
+            del seq2[position]
+        else:
+            seq2.insert(position, generator.choice("abc"))
+    
+    equal = _check_alignment(seq1, seq2, align_sequences(seq1, seq2))
+    
+    assert len(equal) == _lcs_length(seq1, seq2)
+
+
+def test_edit_limit_falls_back_to_rare_anchors(monkeypatch):
+    monkeypatch.setattr(sped_diff, "MAX_DIFF_EDITS", 2)
+    seq1 = ["x"] * 20 + ["y"] * 3 + ["x"] * 20
+    seq2 = ["x"] * 15 + ["y"] * 3 + ["z"] * 5 + ["x"] * 25
+    
+    equal = _check_alignment(seq1, seq2, align_sequences(seq1, seq2))
+    
+    assert [seq1[i] for i, _ in equal].count("y") == 3
+
+
+def test_sequences_without_common_elements_pair_by_position():
+    assert align_sequences(["a", "b", "c"], ["x", "y"]) == [(0, 0), (1, 1), (2, None)]
@@ -0,0 +1,49 @@
+"""Testes da exportação das diferenças."""
+
+import csv
+import json
+
+import pytest
+
+from conftest import sped_records
+from sped_comparator import SpedComparator
+from sped_export import SpedDiffExporter
+
+
+@pytest.fixture
+def comparator(write_sped):
+    file1 = write_sped("a.txt", sped_records(["10,00", "20,00", "30,00"]))
+    file2 = write_sped("b.txt", sped_records(["10,00", "25,00", "30,00"], removed={2}))
+    return SpedComparator(str(file1), str(file2))
+
+
+def test_jsonl_and_csv_have_one_row_per_changed_field(comparator, tmp_path):
+    differences = comparator.compare()
+    expected = sum(max(1, len(difference.field_differences)) for difference in differences)
+    exporter = SpedDiffExporter(comparator)
+    
+    assert exporter.export(str(tmp_path / "diferencas.jsonl")) == expected
+    assert exporter.export(str(tmp_path / "diferencas.csv")) == expected
+    
+    with open(tmp_path / "diferencas.jsonl", encoding="utf-8") as f:
+        jsonl_rows = [json.loads(line) for line in f]
+    with open(tmp_path / "diferencas.csv", encoding="utf-8", newline="") as f:
+        csv_rows = list(csv.DictReader(f))
+    assert len(jsonl_rows) == len(csv_rows) == expected
+    assert [row["record_type"] for row in jsonl_rows] == [row["record_type"] for row in csv_rows]
+    
+    removed = [row for row in jsonl_rows if row["difference_type"] == "RECORD_REMOVED"]
+    assert {row["record_type"] for row in removed} == {"C100", "C170", "C190"}
+    assert all(row["field_index"] is None and row["old_value"].startswith("|") for row in removed)
+
+
+def test_export_streams_when_compare_was_not_called(comparator, tmp_path):
+    total = SpedDiffExporter(comparator).export(str(tmp_path / "diferencas.jsonl"))
+    
+    assert total > 0
+    assert comparator.differences == []
+
+
+def test_invalid_format_is_rejected(comparator, tmp_path):
+    with pytest.raises(ValueError):
+        SpedDiffExporter(comparator).export(str(tmp_path / "diferencas.xlsx"))
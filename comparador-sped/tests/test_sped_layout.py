@@ -0,0 +1,24 @@
+"""Testes das regras de comparação campo a campo."""
+
+from sped_layout import FieldComparisonRules, numbers_equal
+
+
+def test_rules_compare_exact_text_by_default():
+    plan = FieldComparisonRules(ignored_fields=("DT_E_S",)).get_field_plan("C100")
+    
+    assert plan.numeric == frozenset()
+    assert plan.ignored
+
+
+def test_rules_are_hashable():
+    rules = FieldComparisonRules(numeric=True, relevant_fields={"C170": ["VL_ITEM"]})
+    
+    assert hash(rules) == hash(FieldComparisonRules(numeric=True, relevant_fields={"C170": ("VL_ITEM",)}))
+    assert rules.get_field_plan("C170").indexes is not None
+
+
+def test_numbers_equal_uses_exact_difference():
+    assert numbers_equal("1,50", "1,5", 0)
+    assert not numbers_equal("1,004", "1,001", 0)
+    assert numbers_equal("1,01", "1,00", 0.01)
+    assert not numbers_equal("", "0", 0)
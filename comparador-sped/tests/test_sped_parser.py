@@ -0,0 +1,89 @@
+"""Testes do parser SPED e dos seus backends."""
+
+import pytest
+
+from conftest import sped_records
+from sped_parser import SpedParser
+
+
+VALUES = ["10,00", "20,00", "30,00", "40,00"]
+
+
+def _snapshot(records):
+    """Conteúdo comparável de uma sequência de registros."""
+    return [(record.line_number, record.record_type, list(record.fields), record.digest)
+            for record in records]
+
+
+def _parse(path, **options):
+    parser = SpedParser(str(path), **options)
+    parser.parse_file()
+    return parser
+
+
+def test_streaming_mode_does_not_retain_records(write_sped):
+    path = write_sped("efd.txt", sped_records(VALUES))
+    loaded = _parse(path)
+    
+    streaming = _parse(path, retain_records=False)
+    
+    assert len(streaming.records) == 0
+    assert streaming.get_total_records() == loaded.get_total_records()
+    assert streaming.get_statistics() == loaded.get_statistics()
+    assert _snapshot(streaming.iter_records()) == _snapshot(loaded.records)
+    assert _snapshot(streaming.iter_records("C170")) == _snapshot(loaded.records_by_type["C170"])
+
+
+def test_mmap_backend_matches_memory_backend(write_sped):
+    path = write_sped("efd.txt", sped_records(VALUES))
+    loaded = _parse(path)
+    
+    mapped = _parse(path, backend="mmap")
+    try:
+        assert _snapshot(mapped.records) == _snapshot(loaded.records)
+        assert _snapshot(mapped.records_by_type["C100"]) == _snapshot(loaded.records_by_type["C100"])
+        assert list(mapped.iter_raw_lines("C190")) == list(loaded.iter_raw_lines("C190"))
+    finally:
+        mapped.close()
+
+
+def test_columnar_backend_matches_memory_backend(write_sped):
+    path = write_sped("efd.txt", sped_records(VALUES))
+    loaded = _parse(path)
+    
+    columnar = _parse(path, backend="columnar")
+    
+    assert _snapshot(columnar.records) == _snapshot(loaded.records)
+    assert _snapshot(columnar.records_by_type["C170"]) == _snapshot(loaded.records_by_type["C170"])
+    assert columnar.index.memory_usage() > 0
+    assert not hasattr(loaded.records[0], "__dict__")
+
+
+@pytest.mark.parametrize("backend", SpedParser.BACKENDS)
+def test_parallel_parsing_matches_sequential(write_sped, backend):
+    path = write_sped("efd.txt", sped_records([f"{value},00" for value in range(200)]))
+    sequential = _parse(path, backend=backend)
+    
+    parallel = _parse(path, backend=backend, workers=3)
+    try:
+        assert _snapshot(parallel.records) == _snapshot(sequential.records)
+        assert parallel.get_file_digest() == sequential.get_file_digest()
+    finally:
+        parallel.close()
+        sequential.close()
+
+
+@pytest.mark.parametrize("backend", SpedParser.BACKENDS)
+def test_hierarchy_links_children_to_their_parents(write_sped, backend):
+    path = write_sped("efd.txt", sped_records(VALUES))
+    parser = _parse(path, backend=backend)
+    try:
+        c100 = parser.records_by_type["C100"][1]
+        c170 = parser.records_by_type["C170"][1]
+        
+        assert parser.get_parent(c170).line_number == c100.line_number
+        assert parser.get_parent(c100).record_type == "0000"
+        assert [child.line_number for child in parser.get_children(c100, "C170")] == [c170.line_number]
+        assert [record.record_type for record in parser.get_block_records("9")] == ["9999"]
+    finally:
+        parser.close()
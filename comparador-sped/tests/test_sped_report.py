@@ -0,0 +1,60 @@
+"""Testes do relatório HTML."""
+
+import re
+
+import pytest
+
+from conftest import sped_records
+from sped_comparator import SpedComparator
+from sped_report import SpedReportGenerator
+
+
+def _read_report(path):
+    """Conteúdo do relatório sem a data da comparação."""
+    return re.sub(r"Data da comparação:</strong> [^<]*", "", path.read_text(encoding="utf-8"))
+
+
+def test_streaming_html_report_matches_compared_report(write_sped, tmp_path):
+    file1 = write_sped("a.txt", sped_records(["10,00", "20,00", "30,00"]))
+    file2 = write_sped("b.txt", sped_records(["10,00", "25,00", "30,00"], removed={2}))
+    
+    compared = SpedComparator(str(file1), str(file2))
+    compared.compare()
+    SpedReportGenerator(compared).generate_html_report(str(tmp_path / "completo.html"))
+    
+    streamed = SpedComparator(str(file1), str(file2))
+    SpedReportGenerator(streamed).generate_html_report(str(tmp_path / "fluxo.html"))
+    
+    assert compared.get_summary()["total_differences"] > 0
+    assert streamed.differences == []
+    assert streamed.get_summary() == compared.get_summary()
+    assert _read_report(tmp_path / "fluxo.html") == _read_report(tmp_path / "completo.html")
+
+
+def test_paginated_report_splits_each_type_into_pages(write_sped, tmp_path):
+    values = [f"{value},00" for value in range(10, 60, 10)]
+    file1 = write_sped("a.txt", sped_records(values))
+    file2 = write_sped("b.txt", sped_records([value.replace(",00", ",50") for value in values]))
+    comparator = SpedComparator(str(file1), str(file2))
+    comparator.compare()
+    
+    index = SpedReportGenerator(comparator).generate_paginated_html_report(str(tmp_path / "relatorio"), page_size=2)
+    
+    pages = sorted(path.name for path in index.parent.glob("registro_C100_*.html"))
+    assert pages == ["registro_C100_0001.html", "registro_C100_0002.html", "registro_C100_0003.html"]
+    lines = [
+        re.findall(r"MODIFICADO \(Linha (\d+)", (index.parent / page).read_text(encoding="utf-8"))
+        for page in pages
+    ]
+    assert [len(page_lines) for page_lines in lines] == [2, 2, 1]
+    assert sorted(int(line) for page_lines in lines for line in page_lines) == sorted(
+        difference.line_number_file1 for difference in comparator.get_differences_by_type("C100"))
+    assert "registro_C100_0003.html" in index.read_text(encoding="utf-8")
+
+
+def test_paginated_report_requires_compare(write_sped, tmp_path):
+    file1 = write_sped("a.txt", sped_records(["10,00"]))
+    file2 = write_sped("b.txt", sped_records(["20,00"]))
+    
+    with pytest.raises(RuntimeError):
+        SpedReportGenerator(SpedComparator(str(file1), str(file2))).generate_paginated_html_report(str(tmp_path))
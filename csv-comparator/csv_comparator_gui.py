@@ -7,14 +7,36 @@ Compara o conteúdo de dois arquivos CSV das tabelas DWT_DOCTO_FISCAL e DWT_DOCT
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import pandas as pd
+import numpy as np
 import threading
 from datetime import datetime
-import hashlib
+import codecs
+import csv
+import itertools
 import os
+import pickle
+import re
+import tempfile
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 
 class CSVComparatorGUI:
+    # Arquivos CSV acima deste tamanho são comparados em partes, com memória limitada
+    STREAMING_THRESHOLD_BYTES = 1024 * 1024 * 1024
+    CHUNK_ROWS = 200000
+    # Tamanho aproximado de cada partição gravada em disco no modo por chave
+    PARTITION_BYTES = 256 * 1024 * 1024
+    # Chave do segundo hash de linha, usado para confirmar os casamentos por impressão digital
+    VERIFY_HASH_KEY = "csvcomparador_v2"  # 16 caracteres, como exige o pandas
+    # Fração máxima de campos diferentes para um par de linhas ser considerado quase igual
+    NEAR_MATCH_RATIO = 0.5
+    # Quantidade de bytes do início do arquivo usada para detectar o formato do CSV
+    SNIFF_BYTES = 64 * 1024
+    # Valores normalizados que representam números (inteiros, decimais ou com expoente)
+    NUMBER_PATTERN = r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?'
+    INTEGER_PATTERN = r'[+-]?\d+'
+
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Comparador de Arquivos CSV - DWT")
@@ -24,8 +46,13 @@ class CSVComparatorGUI:
         # Variáveis
         self.file1_path = tk.StringVar()
         self.file2_path = tk.StringVar()
+        self.key_columns = tk.StringVar()
+        self.ignore_order = tk.BooleanVar(value=False)
         self.is_comparing = False
         
+        # Formato detectado de cada CSV, por caminho: ((tamanho, mtime), configuração)
+        self._dialect_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        
         # Configurar o estilo
         self.setup_styles()
         
@@ -88,6 +115,15 @@ class CSVComparatorGUI:
         ttk.Entry(files_frame, textvariable=self.file2_path, state='readonly').grid(row=1, column=1, sticky='ew', padx=(0, 10), pady=(10, 0))
         ttk.Button(files_frame, text="Selecionar", command=lambda: self.select_file(2)).grid(row=1, column=2, pady=(10, 0))
         
+        # Colunas-chave (opcional): compara casando registros pela chave
+        ttk.Label(files_frame, text="🔑 Colunas-chave (opcional):").grid(row=2, column=0, sticky='w', padx=(0, 10), pady=(10, 0))
+        ttk.Entry(files_frame, textvariable=self.key_columns).grid(row=2, column=1, sticky='ew', padx=(0, 10), pady=(10, 0))
+        ttk.Label(files_frame, text="separadas por vírgula").grid(row=2, column=2, pady=(10, 0))
+        
+        # Comparação como conjunto de linhas, independente da ordem
+        ttk.Checkbutton(files_frame, text="🧮 Ignorar a ordem das linhas (comparação por impressão digital)",
+                        variable=self.ignore_order).grid(row=3, column=1, sticky='w', pady=(10, 0))
+        
         # Botão de comparação
         self.compare_btn = ttk.Button(main_frame, text="🔍 Comparar Arquivos", 
                                      command=self.start_comparison, style='Action.TButton')
@@ -187,14 +223,28 @@ class CSVComparatorGUI:
         self.progress_bar.start()
         self.progress_var.set("🔍 Iniciando comparação...")
         
+        key_columns = [col.strip() for col in self.key_columns.get().split(',') if col.strip()]
+        
         # Executar comparação em thread separada
-        thread = threading.Thread(target=self.compare_files, args=(file1, file2))
+        thread = threading.Thread(target=self.compare_files,
+                                  args=(file1, file2, key_columns, self.ignore_order.get()))
         thread.daemon = True
         thread.start()
     
-    def compare_files(self, file1_path, file2_path):
-        """Executa a comparação dos arquivos"""
+    def compare_files(self, file1_path, file2_path, key_columns=None, ignore_order=False):
+        """Executa a comparação dos arquivos
+        
+        Sem ``key_columns`` a comparação é posicional (linha a linha); com
+        elas, os registros são casados pelos valores das colunas-chave. Com
+        ``ignore_order`` (e sem chaves) as linhas são comparadas como
+        conjuntos, pela impressão digital de cada linha.
+        """
         try:
+            if self._should_stream(file1_path, file2_path):
+                result = self.compare_files_streaming(file1_path, file2_path, key_columns, ignore_order)
+                self.root.after(0, lambda: self.show_results(result))
+                return
+            
             # Carregar arquivos
             self.root.after(0, lambda: self.progress_var.set("📂 Carregando arquivos..."))
             
@@ -223,7 +273,15 @@ class CSVComparatorGUI:
             
             # Comparar dados
             self.root.after(0, lambda: self.progress_var.set("📊 Comparando dados..."))
-            data_result = self.compare_data(df1, df2, structure_result["common_columns"])
+            if key_columns:
+                missing_keys = [col for col in key_columns if col not in structure_result["common_columns"]]
+                if missing_keys:
+                    raise Exception(f"Colunas-chave não encontradas nos arquivos: {', '.join(missing_keys)}")
+                data_result = self.compare_data_by_key(df1, df2, structure_result["common_columns"], key_columns)
+            elif ignore_order:
+                data_result = self.compare_data_by_hash(df1, df2, structure_result["common_columns"])
+            else:
+                data_result = self.compare_data(df1, df2, structure_result["common_columns"])
             
             result = {
                 "success": True,
@@ -245,6 +303,337 @@ class CSVComparatorGUI:
             }
             self.root.after(0, lambda: self.show_results(error_result))
     
+    def _should_stream(self, file1_path, file2_path):
+        """Indica se os arquivos devem ser comparados em partes (CSV muito grandes)"""
+        paths = (file1_path, file2_path)
+        if any(Path(path).suffix.lower() in ['.xlsx', '.xls'] for path in paths):
+            return False
+        return max(os.path.getsize(path) for path in paths) > self.STREAMING_THRESHOLD_BYTES
+    
+    def compare_files_streaming(self, file1_path, file2_path, key_columns=None, ignore_order=False):
+        """Compara arquivos CSV maiores que a memória, lendo-os em partes
+        
+        No modo posicional os dois arquivos são lidos em blocos alinhados de
+        ``CHUNK_ROWS`` linhas. No modo por chave as linhas são distribuídas
+        pelo hash da chave em partições gravadas em disco, comparadas uma a
+        uma; com ``ignore_order`` (e sem chaves) o mesmo é feito pela
+        impressão digital da linha inteira. Os valores são lidos como texto.
+        """
+        config1 = self._detect_csv_config(file1_path)
+        config2 = self._detect_csv_config(file2_path)
+        
+        self.root.after(0, lambda: self.progress_var.set("🔍 Comparando estruturas..."))
+        structure_result = self.compare_structure(self._read_csv_header(file1_path, config1),
+                                                  self._read_csv_header(file2_path, config2))
+        
+        result = {
+            "success": True,
+            "structure_match": structure_result["columns_match"],
+            "structure_result": structure_result,
+            "file1_name": Path(file1_path).name,
+            "file2_name": Path(file2_path).name,
+        }
+        
+        if not structure_result["columns_match"]:
+            result["file1_count"] = sum(len(chunk) for chunk in self._iter_csv_chunks(file1_path, config1))
+            result["file2_count"] = sum(len(chunk) for chunk in self._iter_csv_chunks(file2_path, config2))
+            return result
+        
+        common_columns = structure_result["common_columns"]
+        if key_columns:
+            missing_keys = [col for col in key_columns if col not in common_columns]
+            if missing_keys:
+                raise Exception(f"Colunas-chave não encontradas nos arquivos: {', '.join(missing_keys)}")
+            data_result, rows1, rows2 = self._compare_partitioned_by_key(
+                file1_path, config1, file2_path, config2, common_columns, key_columns)
+        elif ignore_order:
+            data_result, rows1, rows2 = self._compare_partitioned_by_hash(
+                file1_path, config1, file2_path, config2, common_columns)
+        else:
+            data_result, rows1, rows2 = self._compare_chunks_positional(
+                self._iter_csv_chunks(file1_path, config1), self._iter_csv_chunks(file2_path, config2),
+                common_columns)
+        
+        result["data_result"] = data_result
+        result["file1_count"] = rows1
+        result["file2_count"] = rows2
+        return result
+    
+    def _compare_chunks_positional(self, chunks1, chunks2, common_columns):
+        """Compara posicionalmente dois arquivos lidos em blocos alinhados"""
+        fields = {}
+        common_records_count = 0
+        rows1 = rows2 = 0
+        unique_file1_data = []
+        unique_file2_data = []
+        
+        for chunk1, chunk2 in itertools.zip_longest(chunks1, chunks2):
+            size1 = 0 if chunk1 is None else len(chunk1)
+            size2 = 0 if chunk2 is None else len(chunk2)
+            aligned = min(size1, size2)
+            
+            if aligned:
+                field_differences, _, identical_rows = self._compare_aligned_rows(
+                    chunk1.iloc[:aligned], chunk2.iloc[:aligned], common_columns,
+                    np.arange(rows1, rows1 + aligned)
+                )
+                self._merge_field_differences(fields, field_differences)
+                common_records_count += int(identical_rows.sum())
+            
+            # Linhas além do fim do outro arquivo (no máximo 5 de exemplo)
+            if size1 > aligned and len(unique_file1_data) < 5:
+                unique_file1_data.extend(chunk1.iloc[aligned:aligned + 5 - len(unique_file1_data)].to_dict('records'))
+            if size2 > aligned and len(unique_file2_data) < 5:
+                unique_file2_data.extend(chunk2.iloc[aligned:aligned + 5 - len(unique_file2_data)].to_dict('records'))
+            
+            rows1 += size1
+            rows2 += size2
+            self.root.after(0, lambda rows=max(rows1, rows2): self.progress_var.set(
+                f"📊 Comparando dados... {rows:,} linhas"))
+        
+        min_rows = min(rows1, rows2)
+        field_differences = list(fields.values())
+        
+        return {
+            "common_records": common_records_count,
+            "common_fields": [col for col in common_columns if col not in fields],
+            "common_fields_count": len(common_columns) - len(fields),
+            "unique_in_file1": rows1 - min_rows,
+            "unique_in_file2": rows2 - min_rows,
+            "unique_file1_data": unique_file1_data,
+            "unique_file2_data": unique_file2_data,
+            "field_differences": field_differences,
+            "are_identical": len(field_differences) == 0 and rows1 == rows2
+        }, rows1, rows2
+    
+    def _compare_partitioned_by_key(self, file1_path, config1, file2_path, config2,
+                                    common_columns, key_columns):
+        """Compara pela chave distribuindo as linhas em partições gravadas em disco"""
+        total_size = os.path.getsize(file1_path) + os.path.getsize(file2_path)
+        partitions = max(1, -(-total_size // self.PARTITION_BYTES))
+        
+        with tempfile.TemporaryDirectory(prefix="csv_comparator_") as spill_dir:
+            self.root.after(0, lambda: self.progress_var.set("💾 Particionando arquivo 1..."))
+            rows1 = self._spill_partitions(self._iter_csv_chunks(file1_path, config1), key_columns,
+                                           partitions, Path(spill_dir) / "arquivo1")
+            self.root.after(0, lambda: self.progress_var.set("💾 Particionando arquivo 2..."))
+            rows2 = self._spill_partitions(self._iter_csv_chunks(file2_path, config2), key_columns,
+                                           partitions, Path(spill_dir) / "arquivo2")
+            
+            fields = {}
+            totals = dict.fromkeys(("matched_records", "changed_records", "duplicate_keys_file1",
+                                    "duplicate_keys_file2", "common_records", "unique_in_file1",
+                                    "unique_in_file2"), 0)
+            unique_file1_data = []
+            unique_file2_data = []
+            
+            for partition in range(partitions):
+                self.root.after(0, lambda p=partition: self.progress_var.set(
+                    f"📊 Comparando partição {p + 1} de {partitions}..."))
+                
+                df1 = self._load_partition(Path(spill_dir) / "arquivo1", partition, common_columns)
+                df2 = self._load_partition(Path(spill_dir) / "arquivo2", partition, common_columns)
+                part_result = self.compare_data_by_key(df1, df2, common_columns, key_columns,
+                                                       row_column='_linha')
+                
+                for name in totals:
+                    totals[name] += part_result[name]
+                self._merge_field_differences(fields, part_result["field_differences"])
+                unique_file1_data.extend(part_result["unique_file1_data"])
+                unique_file2_data.extend(part_result["unique_file2_data"])
+        
+        value_columns = [col for col in common_columns if col not in key_columns]
+        field_differences = list(fields.values())
+        
+        data_result = {
+            "mode": "key",
+            "key_columns": list(key_columns),
+            **totals,
+            "common_fields": [col for col in value_columns if col not in fields],
+            "common_fields_count": len(value_columns) - len(fields),
+            "unique_file1_data": self._first_rows(unique_file1_data),
+            "unique_file2_data": self._first_rows(unique_file2_data),
+            "field_differences": field_differences,
+            "are_identical": (totals["changed_records"] == 0 and totals["unique_in_file1"] == 0
+                              and totals["unique_in_file2"] == 0 and totals["duplicate_keys_file1"] == 0
+                              and totals["duplicate_keys_file2"] == 0)
+        }
+        return data_result, rows1, rows2
+    
+    def _compare_partitioned_by_hash(self, file1_path, config1, file2_path, config2, common_columns):
+        """Compara as linhas como conjuntos distribuindo-as em partições pela impressão digital
+        
+        Linhas iguais caem na mesma partição, onde são casadas como em
+        ``compare_data_by_hash``; de cada partição só se guardam as posições
+        das linhas sem par. Uma última leitura dos dois arquivos recupera
+        essas linhas, que são pareadas e comparadas como em
+        ``compare_data_by_hash``: só elas (as linhas alteradas, adicionadas
+        ou removidas) ficam em memória.
+        """
+        columns = sorted(common_columns)
+        total_size = os.path.getsize(file1_path) + os.path.getsize(file2_path)
+        partitions = max(1, -(-total_size // self.PARTITION_BYTES))
+        
+        with tempfile.TemporaryDirectory(prefix="csv_comparator_") as spill_dir:
+            self.root.after(0, lambda: self.progress_var.set("💾 Particionando arquivo 1..."))
+            rows1 = self._spill_partitions(self._iter_csv_chunks(file1_path, config1), columns,
+                                           partitions, Path(spill_dir) / "arquivo1")
+            self.root.after(0, lambda: self.progress_var.set("💾 Particionando arquivo 2..."))
+            rows2 = self._spill_partitions(self._iter_csv_chunks(file2_path, config2), columns,
+                                           partitions, Path(spill_dir) / "arquivo2")
+            
+            common_records_count = 0
+            hash_collisions = 0
+            only_file1 = []
+            only_file2 = []
+            
+            for partition in range(partitions):
+                self.root.after(0, lambda p=partition: self.progress_var.set(
+                    f"📊 Comparando partição {p + 1} de {partitions}..."))
+                
+                df1 = self._load_partition(Path(spill_dir) / "arquivo1", partition, common_columns)
+                df2 = self._load_partition(Path(spill_dir) / "arquivo2", partition, common_columns)
+                part_only1, part_only2, part_common, part_collisions = self._match_fingerprints(
+                    df1, df2, columns)
+                
+                common_records_count += part_common
+                hash_collisions += part_collisions
+                only_file1.append(df1['_linha'].to_numpy(dtype=np.int64)[part_only1])
+                only_file2.append(df2['_linha'].to_numpy(dtype=np.int64)[part_only2])
+        
+        only_file1 = np.sort(np.concatenate(only_file1))
+        only_file2 = np.sort(np.concatenate(only_file2))
+        
+        # Linhas sem par: recuperadas dos arquivos e pareadas pela impressão digital parcial
+        self.root.after(0, lambda: self.progress_var.set("📊 Comparando linhas sem par..."))
+        unpaired1 = self._read_rows_at(file1_path, config1, only_file1, common_columns)
+        unpaired2 = self._read_rows_at(file2_path, config2, only_file2, common_columns)
+        field_differences, common_fields, near_matches = self._compare_unpaired_rows(
+            unpaired1, unpaired2, columns, common_columns, only_file1)
+        
+        return {
+            "mode": "hash",
+            "near_matches": near_matches,
+            "hash_collisions": hash_collisions,
+            "common_records": common_records_count,
+            "common_fields": common_fields,
+            "common_fields_count": len(common_fields),
+            "unique_in_file1": len(only_file1),
+            "unique_in_file2": len(only_file2),
+            "unique_file1_data": unpaired1.iloc[:5].to_dict('records'),
+            "unique_file2_data": unpaired2.iloc[:5].to_dict('records'),
+            "field_differences": field_differences,
+            "are_identical": len(only_file1) == 0 and len(only_file2) == 0
+        }, rows1, rows2
+    
+    def _iter_rows_at(self, chunks, positions):
+        """Seleciona, bloco a bloco, as linhas nas posições indicadas (ordenadas) do arquivo"""
+        rows = 0
+        for chunk in chunks:
+            start, end = np.searchsorted(positions, [rows, rows + len(chunk)])
+            if end > start:
+                selected = chunk.iloc[positions[start:end] - rows].copy()
+                selected['_linha'] = positions[start:end]
+                yield selected
+            rows += len(chunk)
+    
+    def _read_rows_at(self, file_path, config, positions, columns):
+        """Lê do arquivo apenas as linhas nas posições indicadas (ordenadas), nessa ordem"""
+        frames = [frame[columns] for frame in self._iter_rows_at(self._iter_csv_chunks(file_path, config),
+                                                                  positions)]
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+    
+    def _spill_partitions(self, chunks, key_columns, partitions, spill_prefix):
+        """Grava as linhas em partições pelo hash da chave; retorna o total de linhas"""
+        rows = 0
+        for chunk in chunks:
+            chunk['_linha'] = np.arange(rows, rows + len(chunk))
+            rows += len(chunk)
+            
+            keys = pd.DataFrame({col: self._normalize_column(chunk[col]).to_numpy() for col in key_columns})
+            partition_ids = pd.util.hash_pandas_object(keys, index=False).to_numpy() % partitions
+            
+            for partition in np.unique(partition_ids):
+                with open(f"{spill_prefix}_{partition}.pkl", 'ab') as f:
+                    pickle.dump(chunk[partition_ids == partition], f, protocol=pickle.HIGHEST_PROTOCOL)
+        return rows
+    
+    def _load_partition(self, spill_prefix, partition, columns):
+        """Lê todas as partes gravadas de uma partição"""
+        pieces = []
+        try:
+            with open(f"{spill_prefix}_{partition}.pkl", 'rb') as f:
+                while True:
+                    try:
+                        pieces.append(pickle.load(f))
+                    except EOFError:
+                        break
+        except FileNotFoundError:
+            pass
+        
+        if not pieces:
+            return pd.DataFrame(columns=list(columns) + ['_linha'])
+        return pd.concat(pieces, ignore_index=True)
+    
+    def _merge_field_differences(self, fields, field_differences):
+        """Acumula diferenças por campo de várias partes (soma e até 3 exemplos)"""
+        for field_diff in field_differences:
+            total = fields.get(field_diff['field_name'])
+            if total is None:
+                fields[field_diff['field_name']] = {
+                    'field_name': field_diff['field_name'],
+                    'differences_count': field_diff['differences_count'],
+                    'examples': list(field_diff['examples'])
+                }
+            else:
+                total['differences_count'] += field_diff['differences_count']
+                total['examples'] = sorted(total['examples'] + field_diff['examples'],
+                                           key=lambda example: example['row_number'])[:3]
+    
+    def _first_rows(self, rows):
+        """Primeiras 5 linhas (pela posição no arquivo) de exemplos vindos de várias partições"""
+        rows = sorted(rows, key=lambda row: row['_linha'])[:5]
+        for row in rows:
+            del row['_linha']
+        return rows
+    
+    def _iter_csv_chunks(self, file_path, config):
+        """Lê um CSV em blocos de ``CHUNK_ROWS`` linhas, com os valores como texto
+        
+        Se aparecer um byte inválido em UTF-8 depois da amostra usada na
+        detecção, a leitura continua como Latin-1 a partir da primeira linha
+        ainda não entregue, como faz ``_read_csv_auto``.
+        """
+        rows = 0
+        try:
+            for chunk in pd.read_csv(file_path, chunksize=self.CHUNK_ROWS, dtype=str, **config):
+                chunk.columns = chunk.columns.str.strip().str.strip('"').str.strip("'")
+                rows += len(chunk)
+                yield chunk
+        except UnicodeDecodeError:
+            if config['encoding'] == 'latin1':
+                raise
+            config = {**config, 'encoding': 'latin1'}
+            cache_key = str(Path(file_path).resolve())
+            if cache_key in self._dialect_cache:
+                self._dialect_cache[cache_key] = (self._dialect_cache[cache_key][0], config)
+        
+            # Mantém o cabeçalho (linha 0) e pula as linhas já entregues
+            skip = rows
+            for chunk in pd.read_csv(file_path, chunksize=self.CHUNK_ROWS, dtype=str,
+                                     skiprows=lambda line: 0 < line <= skip, **config):
+                chunk.columns = chunk.columns.str.strip().str.strip('"').str.strip("'")
+                chunk.index += skip
+                yield chunk
+    
+    def _read_csv_header(self, file_path, config):
+        """Lê apenas o cabeçalho de um CSV"""
+        df = pd.read_csv(file_path, nrows=0, **config)
+        df.columns = df.columns.str.strip().str.strip('"').str.strip("'")
+        return df
+    
     def compare_structure(self, df1, df2):
         """Compara a estrutura dos DataFrames"""
         cols1 = set(df1.columns)
@@ -260,77 +649,31 @@ class CSVComparatorGUI:
         }
     
     def compare_data(self, df1, df2, common_columns):
-        """Compara dados dos DataFrames com análise campo por campo"""
+        """Compara dados dos DataFrames com análise campo por campo
         
-        # Análise detalhada campo por campo (linha por linha)
-        field_differences = []
-        common_fields = []
-        common_records_count = 0
+        A comparação é posicional (linha i do arquivo 1 com a linha i do
+        arquivo 2) e vetorizada: cada coluna é normalizada de uma só vez e
+        gera uma máscara booleana de diferenças, da qual saem a contagem, os
+        exemplos e os registros completamente idênticos.
+        """
         
         # Determina número mínimo de linhas para comparação posicional
         min_rows = min(len(df1), len(df2))
         
-        # Analisa cada campo individualmente
-        for col in common_columns:
-            field_has_differences = False
-            examples = []
-            
-            # Compara valores do campo linha por linha
-            for row_idx in range(min_rows):
-                val1 = df1.iloc[row_idx][col]
-                val2 = df2.iloc[row_idx][col]
-                
-                norm_val1 = self._normalize_value(val1)
-                norm_val2 = self._normalize_value(val2)
-                
-                if norm_val1 != norm_val2:
-                    field_has_differences = True
-                    if len(examples) < 3:  # Máximo 3 exemplos
-                        examples.append({
-                            'file1_value': val1,
-                            'file2_value': val2,
-                            'row_number': row_idx + 1
-                        })
-            
-            if field_has_differences:
-                # Conta quantas diferenças existem neste campo
-                diff_count = sum(1 for i in range(min_rows) 
-                               if self._normalize_value(df1.iloc[i][col]) != 
-                                  self._normalize_value(df2.iloc[i][col]))
-                
-                field_differences.append({
-                    'field_name': col,
-                    'differences_count': diff_count,
-                    'examples': examples
-                })
-            else:
-                common_fields.append(col)
+        field_differences, common_fields, identical_rows = self._compare_aligned_rows(
+            df1.iloc[:min_rows], df2.iloc[:min_rows], common_columns, np.arange(min_rows)
+        )
         
         # Conta registros completamente idênticos (todas as colunas iguais)
-        for row_idx in range(min_rows):
-            row_identical = True
-            for col in common_columns:
-                val1 = df1.iloc[row_idx][col]
-                val2 = df2.iloc[row_idx][col]
-                if self._normalize_value(val1) != self._normalize_value(val2):
-                    row_identical = False
-                    break
-            if row_identical:
-                common_records_count += 1
+        common_records_count = int(identical_rows.sum())
         
         # Registros únicos baseados em diferença de tamanho
         unique_records_file1 = max(0, len(df1) - min_rows) 
         unique_records_file2 = max(0, len(df2) - min_rows)
         
-        # Dados dos registros únicos (se existirem)
-        unique_file1_data = []
-        unique_file2_data = []
-        
-        if unique_records_file1 > 0:
-            unique_file1_data = [df1.iloc[i].to_dict() for i in range(min_rows, len(df1))][:5]
-        
-        if unique_records_file2 > 0:
-            unique_file2_data = [df2.iloc[i].to_dict() for i in range(min_rows, len(df2))][:5]
+        # Dados dos registros únicos (no máximo 5 de cada arquivo)
+        unique_file1_data = df1.iloc[min_rows:min_rows + 5].to_dict('records')
+        unique_file2_data = df2.iloc[min_rows:min_rows + 5].to_dict('records')
         
         return {
             "common_records": common_records_count,
@@ -344,14 +687,304 @@ class CSVComparatorGUI:
             "are_identical": len(field_differences) == 0 and unique_records_file1 == 0 and unique_records_file2 == 0
         }
     
+    def compare_data_by_key(self, df1, df2, common_columns, key_columns, row_column=None):
+        """Compara dados dos DataFrames casando os registros pelas colunas-chave
+        
+        Os registros são casados por uma junção por hash (``merge``) sobre as
+        chaves normalizadas, resultando em registros casados, alterados e
+        exclusivos de cada arquivo. Chaves repetidas num mesmo arquivo são
+        contadas e apenas a primeira ocorrência é comparada. ``row_column``
+        indica a coluna com a posição original das linhas no arquivo 1
+        (usada quando os DataFrames são partições de arquivos maiores).
+        """
+        keys1 = self._build_key_frame(df1, key_columns, '_linha1')
+        keys2 = self._build_key_frame(df2, key_columns, '_linha2')
+        
+        duplicate_keys_file1 = int(keys1.duplicated(key_columns).sum())
+        duplicate_keys_file2 = int(keys2.duplicated(key_columns).sum())
+        keys1 = keys1.drop_duplicates(key_columns)
+        keys2 = keys2.drop_duplicates(key_columns)
+        
+        joined = keys1.merge(keys2, on=key_columns, how='outer', indicator=True, sort=False)
+        
+        matched = joined[joined['_merge'] == 'both']
+        only_file1 = joined.loc[joined['_merge'] == 'left_only', '_linha1'].to_numpy(dtype=np.int64)
+        only_file2 = joined.loc[joined['_merge'] == 'right_only', '_linha2'].to_numpy(dtype=np.int64)
+        
+        positions1 = matched['_linha1'].to_numpy(dtype=np.int64)
+        positions2 = matched['_linha2'].to_numpy(dtype=np.int64)
+        
+        # Compara os registros casados nas colunas que não são chave
+        value_columns = [col for col in common_columns if col not in key_columns]
+        row_positions = positions1 if row_column is None else df1[row_column].to_numpy(dtype=np.int64)[positions1]
+        field_differences, common_fields, identical_rows = self._compare_aligned_rows(
+            df1.iloc[positions1], df2.iloc[positions2], value_columns, row_positions
+        )
+        
+        common_records_count = int(identical_rows.sum())
+        changed_records_count = len(positions1) - common_records_count
+        
+        return {
+            "mode": "key",
+            "key_columns": list(key_columns),
+            "matched_records": len(positions1),
+            "changed_records": changed_records_count,
+            "duplicate_keys_file1": duplicate_keys_file1,
+            "duplicate_keys_file2": duplicate_keys_file2,
+            "common_records": common_records_count,
+            "common_fields": common_fields,
+            "common_fields_count": len(common_fields),
+            "unique_in_file1": len(only_file1),
+            "unique_in_file2": len(only_file2),
+            "unique_file1_data": df1.iloc[np.sort(only_file1)[:5]].to_dict('records'),
+            "unique_file2_data": df2.iloc[np.sort(only_file2)[:5]].to_dict('records'),
+            "field_differences": field_differences,
+            "are_identical": (changed_records_count == 0 and len(only_file1) == 0 and len(only_file2) == 0
+                              and duplicate_keys_file1 == 0 and duplicate_keys_file2 == 0)
+        }
+    
+    def compare_data_by_hash(self, df1, df2, common_columns):
+        """Compara os DataFrames como conjuntos de linhas, independente da ordem
+        
+        Cada linha recebe uma impressão digital de 64 bits calculada sobre as
+        colunas normalizadas (``generate_row_hashes``); as linhas são casadas
+        pela impressão digital, respeitando repetições. Um segundo hash, com
+        outra chave, confirma cada casamento, e os pares que divergem nele
+        (colisões) voltam para as linhas sem par. Só as linhas sem par são
+        comparadas campo a campo, pareadas por ``_compare_unpaired_rows``.
+        """
+        columns = sorted(common_columns)  # Ordena para garantir consistência
+        
+        only_file1, only_file2, common_records_count, hash_collisions = self._match_fingerprints(
+            df1, df2, columns)
+        
+        field_differences, common_fields, near_matches = self._compare_unpaired_rows(
+            df1.iloc[only_file1], df2.iloc[only_file2], columns, common_columns, only_file1)
+        
+        return {
+            "mode": "hash",
+            "near_matches": near_matches,
+            "hash_collisions": hash_collisions,
+            "common_records": common_records_count,
+            "common_fields": common_fields,
+            "common_fields_count": len(common_fields),
+            "unique_in_file1": len(only_file1),
+            "unique_in_file2": len(only_file2),
+            "unique_file1_data": df1.iloc[only_file1[:5]].to_dict('records'),
+            "unique_file2_data": df2.iloc[only_file2[:5]].to_dict('records'),
+            "field_differences": field_differences,
+            "are_identical": len(only_file1) == 0 and len(only_file2) == 0
+        }
+    
+    def _match_fingerprints(self, df1, df2, columns):
+        """Casa as linhas dos dois DataFrames pela impressão digital
+        
+        Retorna as posições (ordenadas) das linhas sem par em cada DataFrame,
+        o número de linhas casadas e o número de colisões descartadas.
+        """
+        rows1 = self._build_fingerprint_frame(df1, columns, '_linha1')
+        rows2 = self._build_fingerprint_frame(df2, columns, '_linha2')
+        joined = rows1.merge(rows2, on=['_hash', '_ocorrencia'], how='outer', indicator=True, sort=False)
+        
+        matched = joined[joined['_merge'] == 'both']
+        collisions = matched[matched['_verificacao_x'] != matched['_verificacao_y']]
+        
+        only_file1 = np.sort(np.concatenate([
+            joined.loc[joined['_merge'] == 'left_only', '_linha1'].to_numpy(dtype=np.int64),
+            collisions['_linha1'].to_numpy(dtype=np.int64)
+        ]))
+        only_file2 = np.sort(np.concatenate([
+            joined.loc[joined['_merge'] == 'right_only', '_linha2'].to_numpy(dtype=np.int64),
+            collisions['_linha2'].to_numpy(dtype=np.int64)
+        ]))
+        return only_file1, only_file2, len(matched) - len(collisions), len(collisions)
+    
+    def _compare_unpaired_rows(self, unpaired1, unpaired2, columns, common_columns, row_positions):
+        """Pareia as linhas sem par que diferem em um único campo e as compara campo a campo
+        
+        Como os arquivos podem estar em outra ordem, a posição não serve
+        para parear: para cada coluna, as linhas ainda sem par são casadas
+        pela impressão digital das demais colunas (``_pair_by_partial_fingerprint``).
+        As que continuam sem par contam apenas como únicas.
+        """
+        pairs1, pairs2 = self._pair_by_partial_fingerprint(unpaired1, unpaired2, columns)
+        return self._compare_near_matches(unpaired1.iloc[pairs1], unpaired2.iloc[pairs2], columns,
+                                          common_columns, np.asarray(row_positions)[pairs1])
+    
+    def _pair_by_partial_fingerprint(self, unpaired1, unpaired2, columns):
+        """Casa as linhas iguais em todas as colunas menos uma
+        
+        Retorna as posições (em ``unpaired1`` e ``unpaired2``) dos pares,
+        ordenadas pela posição no primeiro DataFrame.
+        """
+        free1 = np.arange(len(unpaired1))
+        free2 = np.arange(len(unpaired2))
+        pairs1 = [np.zeros(0, dtype=np.int64)]
+        pairs2 = [np.zeros(0, dtype=np.int64)]
+        
+        for col in (columns if len(columns) > 1 else []):
+            if len(free1) == 0 or len(free2) == 0:
+                break
+            others = [other for other in columns if other != col]
+            rows1 = self._build_fingerprint_frame(unpaired1.iloc[free1], others, '_linha1')
+            rows2 = self._build_fingerprint_frame(unpaired2.iloc[free2], others, '_linha2')
+            joined = rows1.merge(rows2, on=['_hash', '_ocorrencia'], sort=False)
+            joined = joined[joined['_verificacao_x'] == joined['_verificacao_y']]
+            if joined.empty:
+                continue
+            
+            matched1 = free1[joined['_linha1'].to_numpy(dtype=np.int64)]
+            matched2 = free2[joined['_linha2'].to_numpy(dtype=np.int64)]
+            pairs1.append(matched1)
+            pairs2.append(matched2)
+            free1 = np.setdiff1d(free1, matched1)
+            free2 = np.setdiff1d(free2, matched2)
+        
+        pairs1 = np.concatenate(pairs1)
+        pairs2 = np.concatenate(pairs2)
+        order = np.argsort(pairs1, kind='stable')
+        return pairs1[order], pairs2[order]
+    
+    def _compare_near_matches(self, candidates1, candidates2, columns, common_columns, row_positions):
+        """Compara campo a campo os pares de linhas sem par que são quase iguais
+        
+        Os pares que diferem em até ``NEAR_MATCH_RATIO`` dos campos geram as
+        diferenças por campo. Retorna as diferenças, os campos sem diferenças
+        e o número de pares quase iguais.
+        """
+        differing_fields = np.zeros(len(candidates1), dtype=np.int64)
+        for col in columns:
+            differing_fields += (self._normalize_column(candidates1[col]).to_numpy() !=
+                                 self._normalize_column(candidates2[col]).to_numpy())
+        near = differing_fields <= len(columns) * self.NEAR_MATCH_RATIO
+        
+        field_differences, common_fields, _ = self._compare_aligned_rows(
+            candidates1[near], candidates2[near], common_columns, np.asarray(row_positions)[near]
+        )
+        return field_differences, common_fields, int(near.sum())
+    
+    def _build_fingerprint_frame(self, df, columns, position_column):
+        """Monta as impressões digitais das linhas, com o número da ocorrência e a posição de cada linha"""
+        hashes = self.generate_row_hashes(df, columns)
+        fingerprints = pd.DataFrame({
+            '_hash': hashes,
+            # Linhas repetidas casam uma a uma: a 1ª ocorrência com a 1ª, a 2ª com a 2ª...
+            '_ocorrencia': pd.Series(hashes).groupby(hashes).cumcount().to_numpy(),
+            '_verificacao': self.generate_row_hashes(df, columns, self.VERIFY_HASH_KEY),
+        })
+        fingerprints[position_column] = np.arange(len(df))
+        return fingerprints
+    
+    def _build_key_frame(self, df, key_columns, position_column):
+        """Monta as chaves normalizadas de um DataFrame com a posição de cada linha"""
+        keys = pd.DataFrame({col: self._normalize_column(df[col]).to_numpy() for col in key_columns})
+        keys[position_column] = np.arange(len(df))
+        return keys
+    
+    def _compare_aligned_rows(self, left, right, columns, row_positions):
+        """Compara, coluna a coluna, linhas já alinhadas de dois DataFrames
+        
+        Retorna as diferenças por campo (contagem e até 3 exemplos), os campos
+        sem diferenças e a máscara das linhas com todas as colunas iguais.
+        ``row_positions`` indica a posição no arquivo 1 de cada linha alinhada.
+        """
+        field_differences = []
+        common_fields = []
+        
+        # Linhas em que todas as colunas coincidem
+        identical_rows = np.ones(len(left), dtype=bool)
+        
+        # Analisa cada campo individualmente
+        for col in columns:
+            values1 = left[col]
+            values2 = right[col]
+            
+            diff_mask = (self._normalize_column(values1).to_numpy() !=
+                         self._normalize_column(values2).to_numpy())
+            diff_count = int(diff_mask.sum())
+            
+            if diff_count:
+                identical_rows &= ~diff_mask
+                
+                examples = []
+                for row_idx in np.flatnonzero(diff_mask)[:3]:  # Máximo 3 exemplos
+                    examples.append({
+                        'file1_value': values1.iat[row_idx],
+                        'file2_value': values2.iat[row_idx],
+                        'row_number': int(row_positions[row_idx]) + 1
+                    })
+                
+                field_differences.append({
+                    'field_name': col,
+                    'differences_count': diff_count,
+                    'examples': examples
+                })
+            else:
+                common_fields.append(col)
+        
+        return field_differences, common_fields, identical_rows
+    
+    def _normalize_column(self, series: pd.Series) -> pd.Series:
+        """Normaliza uma coluna inteira para comparação
+        
+        Equivale a aplicar ``_normalize_value`` em cada célula: nulos viram
+        "NULL", textos têm espaços removidos e vírgula trocada por ponto e os
+        demais valores são convertidos para texto. Por fim, os números são
+        escritos na forma canônica de ``_canonical_number``: "007", "7" e 7
+        ficam "7"; "1.50" e 1.5 ficam "1.5". Assim o resultado é o mesmo com
+        os tipos inferidos pelo pandas (arquivos em memória) ou com os valores
+        lidos como texto (arquivos comparados em partes).
+        """
+        is_null = series.isna()
+        normalized = series.astype(str).str.strip()
+        
+        if isinstance(series.dtype, pd.StringDtype):
+            # Coluna de texto do pandas 3 (dtype "str"): todos os valores são textos
+            normalized = normalized.str.replace(',', '.', regex=False)
+        elif pd.api.types.is_object_dtype(series.dtype):
+            kind = pd.api.types.infer_dtype(series, skipna=True)
+            if kind == 'string':
+                normalized = normalized.str.replace(',', '.', regex=False)
+            elif kind.startswith('mixed'):
+                # Coluna com textos e outros tipos: só os textos trocam a vírgula
+                is_text = series.map(lambda value: isinstance(value, str))
+                normalized = normalized.where(~is_text, normalized.str.replace(',', '.', regex=False))
+        
+        is_number = normalized.str.fullmatch(self.NUMBER_PATTERN) & ~is_null
+        if is_number.any():
+            numbers = normalized[is_number]
+            canonical = {value: self._canonical_number(value) for value in numbers.unique()}
+            normalized = normalized.where(~is_number, numbers.map(canonical))
+        
+        return normalized.where(~is_null, "NULL")
+    
     def _normalize_value(self, value) -> str:
         """Normaliza valor para comparação"""
         if pd.isna(value):
             return "NULL"
         elif isinstance(value, str):
-            return value.strip().replace(',', '.')
+            normalized = value.strip().replace(',', '.')
         else:
-            return str(value).strip()
+            normalized = str(value).strip()
+        
+        if re.fullmatch(self.NUMBER_PATTERN, normalized):
+            return self._canonical_number(normalized)
+        return normalized
+    
+    def _canonical_number(self, text: str) -> str:
+        """Forma canônica de um número em texto
+        
+        Inteiros são reescritos sem zeros à esquerda, com precisão exata
+        (chaves longas não perdem dígitos). Os demais passam por ``float``,
+        como faria a inferência de tipos do pandas, e valores inteiros
+        perdem o ".0".
+        """
+        if re.fullmatch(self.INTEGER_PATTERN, text):
+            return str(int(text))
+        number = float(text)
+        if number.is_integer() and abs(number) < 1e16:
+            return str(int(number))
+        return repr(number)
     
     def _read_file_auto(self, file_path: str) -> pd.DataFrame:
         """
@@ -384,42 +1017,115 @@ class CSVComparatorGUI:
             except Exception:
                 raise Exception(f"Erro ao ler arquivo Excel: {str(e)}")
     
+    def _detect_csv_config(self, file_path: str) -> Dict[str, Any]:
+        """Detecta encoding, separador e aspas de um CSV lendo apenas o início do arquivo
+        
+        São lidos no máximo ``SNIFF_BYTES`` bytes. O resultado fica guardado
+        por caminho e é reaproveitado enquanto o tamanho e a data de
+        modificação do arquivo não mudarem.
+        """
+        cache_key = str(Path(file_path).resolve())
+        stat = os.stat(file_path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        
+        cached = self._dialect_cache.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        
+        with open(file_path, 'rb') as f:
+            sample = f.read(self.SNIFF_BYTES)
+        
+        encoding, text = self._sniff_encoding(sample)
+        lines = text.splitlines()
+        if len(sample) == self.SNIFF_BYTES and len(lines) > 1:
+            lines = lines[:-1]  # Última linha possivelmente cortada
+        lines = [line for line in lines if line.strip()]
+        
+        if not lines:
+            raise Exception(f"Não foi possível ler o arquivo CSV: {file_path}")
+        
+        sep = self._sniff_separator(lines)
+        config = {'sep': sep, 'encoding': encoding, **self._sniff_quoting(lines, sep)}
+        
+        if len(next(csv.reader(lines[:1], delimiter=sep))) < 2:
+            raise Exception(f"Não foi possível ler o arquivo CSV: {file_path}")
+        
+        self._dialect_cache[cache_key] = (signature, config)
+        return config
+    
+    def _sniff_encoding(self, sample: bytes) -> Tuple[str, str]:
+        """Detecta o encoding da amostra: UTF-8 (com ou sem BOM) ou, se inválido, Latin-1"""
+        if sample.startswith(codecs.BOM_UTF8):
+            encoding = 'utf-8-sig'
+        else:
+            encoding = 'utf-8'
+        
+        try:
+            # Decodificador incremental: tolera um caractere cortado no fim da amostra
+            return encoding, codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+        except UnicodeDecodeError:
+            return 'latin1', sample.decode('latin1')
+    
+    def _sniff_separator(self, lines: List[str]) -> str:
+        """Detecta o separador (ponto e vírgula ou vírgula) a partir das primeiras linhas"""
+        try:
+            return csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=';,').delimiter
+        except csv.Error:
+            # Sem padrão consistente: usa o separador mais frequente no cabeçalho
+            return ';' if lines[0].count(';') >= lines[0].count(',') else ','
+    
+    def _sniff_quoting(self, lines: List[str], sep: str) -> Dict[str, Any]:
+        """Escolhe entre aspas duplas e QUOTE_NONE conforme a consistência do número de campos"""
+        if '"' not in "".join(lines):
+            return {'quotechar': '"'}
+        
+        try:
+            # Cada linha lida isoladamente: aspas sem fechamento geram erro
+            widths = {len(next(csv.reader([line], delimiter=sep, quotechar='"', strict=True)))
+                      for line in lines}
+        except csv.Error:
+            widths = set()
+        
+        if len(widths) != 1 and len({len(line.split(sep)) for line in lines}) == 1:
+            return {'quoting': csv.QUOTE_NONE}
+        return {'quotechar': '"'}
+    
     def _read_csv_auto(self, file_path: str) -> pd.DataFrame:
-        """Lê arquivo CSV com detecção automática de formato"""
-        configs = [
-            {'sep': ';', 'encoding': 'utf-8', 'quotechar': '"'},
-            {'sep': ',', 'encoding': 'utf-8', 'quotechar': '"'},
-            {'sep': ';', 'encoding': 'utf-8', 'quoting': 3},  # QUOTE_NONE
-            {'sep': ',', 'encoding': 'utf-8', 'quoting': 3},  # QUOTE_NONE
-            {'sep': ';', 'encoding': 'latin1', 'quotechar': '"'},
-            {'sep': ',', 'encoding': 'latin1', 'quotechar': '"'},
-        ]
+        """Lê arquivo CSV com detecção automática de formato (uma única leitura completa)"""
+        config = self._detect_csv_config(file_path)
+        cache_key = str(Path(file_path).resolve())
         
-        for config in configs:
+        try:
             try:
                 df = pd.read_csv(file_path, **config)
-                df.columns = df.columns.str.strip().str.strip('"').str.strip("'")
-                
-                if len(df.columns) > 1 and len(df) > 0:
-                    return df
-                    
-            except Exception:
-                continue
+            except UnicodeDecodeError:
+                # Byte inválido em UTF-8 depois da amostra: relê uma vez como Latin-1
+                config = {**config, 'encoding': 'latin1'}
+                df = pd.read_csv(file_path, **config)
+                self._dialect_cache[cache_key] = (self._dialect_cache[cache_key][0], config)
+        except Exception as e:
+            # Formato detectado não serve mais: descarta para detectar de novo na próxima vez
+            self._dialect_cache.pop(cache_key, None)
+            raise Exception(f"Não foi possível ler o arquivo CSV: {file_path} ({e})")
+        
+        df.columns = df.columns.str.strip().str.strip('"').str.strip("'")
+        
+        if len(df.columns) > 1 and len(df) > 0:
+            return df
         
         raise Exception(f"Não foi possível ler o arquivo CSV: {file_path}")
     
-    def generate_row_hash(self, row, columns):
-        """Gera hash MD5 para uma linha usando colunas específicas"""
-        values = []
-        for col in sorted(columns):  # Ordena para garantir consistência
-            val = row.get(col)
-            if pd.isna(val):
-                values.append("NULL")
-            else:
-                values.append(str(val).strip())
+    def generate_row_hashes(self, df, columns, hash_key=None) -> np.ndarray:
+        """Gera o hash de 64 bits de cada linha usando colunas específicas
         
-        row_string = "|".join(values)
-        return hashlib.md5(row_string.encode('utf-8')).hexdigest()
+        Os valores são normalizados como na comparação campo a campo e o hash
+        é calculado de uma só vez para todas as linhas. ``hash_key`` permite
+        obter um segundo hash, independente do primeiro.
+        """
+        normalized = pd.DataFrame({col: self._normalize_column(df[col]).to_numpy() for col in columns})
+        if hash_key is None:
+            return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+        return pd.util.hash_pandas_object(normalized, index=False, hash_key=hash_key).to_numpy()
     
     def show_results(self, result):
         """Mostra resultados na interface"""
@@ -531,6 +1237,19 @@ Registros completamente idênticos: {data['common_records']:,}
 Únicos no arquivo 2: {data['unique_in_file2']:,}
             """
             
+            if data.get('mode') == 'key':
+                report += f"Colunas-chave: {', '.join(data['key_columns'])}\n"
+                report += f"Registros casados pela chave: {data['matched_records']:,}\n"
+                report += f"Registros casados com alterações: {data['changed_records']:,}\n"
+                if data['duplicate_keys_file1'] or data['duplicate_keys_file2']:
+                    report += (f"⚠️ Chaves repetidas (ignoradas): {data['duplicate_keys_file1']:,} no arquivo 1, "
+                               f"{data['duplicate_keys_file2']:,} no arquivo 2\n")
+            elif data.get('mode') == 'hash':
+                report += "Ordem das linhas ignorada (comparação por impressão digital)\n"
+                report += f"Linhas sem par quase iguais (comparadas campo a campo): {data['near_matches']:,}\n"
+                if data['hash_collisions']:
+                    report += f"⚠️ Colisões de hash descartadas: {data['hash_collisions']:,}\n"
+            
             # Mostra informações sobre campos
             if data.get('common_fields_count', 0) > 0:
                 report += f"Campos com valores idênticos: {data['common_fields_count']:,}\n"
@@ -0,0 +1,56 @@
+"""Configuração dos testes do comparador de CSV."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from csv_comparator_gui import CSVComparatorGUI  # noqa: E402
+
+
+class _ImmediateRoot:
+    """Substitui a janela Tk: executa na hora as chamadas agendadas com ``after``."""
+    
+    def after(self, delay, callback, *args):
+        callback(*args)
+
+
+class _Variable:
+    """Substitui ``tk.StringVar`` nas mensagens de progresso."""
+    
+    def set(self, value):
+        pass
+
+
+@pytest.fixture
+def comparator():
+    """Comparador sem interface gráfica; ``compare`` devolve o resultado exibido."""
+    gui = CSVComparatorGUI.__new__(CSVComparatorGUI)
+    gui.root = _ImmediateRoot()
+    gui.progress_var = _Variable()
+    gui._dialect_cache = {}
+    
+    results = []
+    gui.show_results = results.append
+    
+    def compare(file1, file2, key_columns=None, ignore_order=False, streaming=False):
+        gui.STREAMING_THRESHOLD_BYTES = 0 if streaming else CSVComparatorGUI.STREAMING_THRESHOLD_BYTES
+        gui.compare_files(str(file1), str(file2), key_columns, ignore_order)
+        result = results.pop()
+        assert result["success"], result.get("error")
+        return result
+    
+    gui.compare = compare
+    return gui
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """Grava um CSV em ``tmp_path`` a partir das linhas (listas de valores)."""
+    def write(name, rows, sep=';', encoding='utf-8'):
+        path = tmp_path / name
+        path.write_bytes("\n".join(sep.join(row) for row in rows).encode(encoding) + b"\n")
+        return path
+    return write
@@ -0,0 +1,160 @@
+"""Testes de comportamento do comparador de CSV (sem interface gráfica)."""
+
+import pandas as pd
+import pytest
+
+
+ROWS1 = [
+    ["id", "codigo", "valor", "descricao"],
+    ["1", "007", "1.50", "caneta"],
+    ["2", "8", "2", "lapis"],
+    ["3", "9", "3.25", "borracha"],
+]
+ROWS2 = [
+    ["id", "codigo", "valor", "descricao"],
+    ["1", "7", "1,5", "caneta"],
+    ["2", "8", "2.0", "lapiseira"],
+    ["3", "9", "3.25", "borracha"],
+]
+
+
+def _summary(result):
+    """Parte do resultado que deve ser igual em todos os caminhos de leitura."""
+    data = result["data_result"]
+    return {
+        "common_records": data["common_records"],
+        "unique_in_file1": data["unique_in_file1"],
+        "unique_in_file2": data["unique_in_file2"],
+        "field_differences": {field["field_name"]: field["differences_count"]
+                              for field in data["field_differences"]},
+        "are_identical": data["are_identical"],
+    }
+
+
+@pytest.mark.parametrize("key_columns, ignore_order", [(None, False), (["id"], False), (None, True)])
+def test_streaming_matches_in_memory(comparator, write_csv, key_columns, ignore_order):
+    file1 = write_csv("a.csv", ROWS1)
+    file2 = write_csv("b.csv", ROWS2)
+    
+    in_memory = comparator.compare(file1, file2, key_columns, ignore_order)
+    streaming = comparator.compare(file1, file2, key_columns, ignore_order, streaming=True)
+    
+    assert _summary(streaming) == _summary(in_memory)
+
+
+def test_numbers_compare_by_value(comparator, write_csv):
+    file1 = write_csv("a.csv", ROWS1)
+    file2 = write_csv("b.csv", ROWS2)
+    
+    result = comparator.compare(file1, file2)
+    
+    # "007"/"7", "1.50"/"1,5" e "2"/"2.0" são o mesmo número; só a descrição muda
+    assert _summary(result)["field_differences"] == {"descricao": 1}
+
+
+def test_long_numeric_keys_keep_every_digit(comparator, write_csv):
+    key = "35240112345678000199550010000000011000000017"
+    file1 = write_csv("a.csv", [["chave", "valor"], [key, "1"]])
+    file2 = write_csv("b.csv", [["chave", "valor"], [key[:-1] + "8", "1"]])
+    
+    for streaming in (False, True):
+        result = comparator.compare(file1, file2, streaming=streaming)
+        assert _summary(result)["field_differences"] == {"chave": 1}
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_ignore_order_pairs_edited_rows_in_shuffled_files(comparator, write_csv, streaming):
+    header = ["id", "nome", "valor"]
+    rows = [[str(i), f"nome{i}", f"{i},50"] for i in range(40)]
+    edited = [list(row) for row in rows]
+    edited[3][1] = "outro nome"
+    edited[17][2] = "99,99"
+    edited.reverse()
+    file1 = write_csv("a.csv", [header] + rows)
+    file2 = write_csv("b.csv", [header] + edited)
+    
+    result = comparator.compare(file1, file2, ignore_order=True, streaming=streaming)
+    
+    data = result["data_result"]
+    assert data["common_records"] == 38
+    assert data["near_matches"] == 2
+    assert _summary(result)["field_differences"] == {"nome": 1, "valor": 1}
+
+
+def test_positional_comparison_counts_and_examples(comparator):
+    df1 = pd.DataFrame({"id": [1, 2, 3, 4], "valor": ["1,5", None, " x ", "a"]})
+    df2 = pd.DataFrame({"id": [1, 2, 3], "valor": ["1.5", None, "y"]})
+    
+    data = comparator.compare_data(df1, df2, ["id", "valor"])
+    
+    assert data["common_records"] == 2
+    assert data["unique_in_file1"] == 1
+    assert data["unique_in_file2"] == 0
+    assert data["common_fields"] == ["id"]
+    [field] = data["field_differences"]
+    assert field["differences_count"] == 1
+    assert field["examples"] == [{"file1_value": " x ", "file2_value": "y", "row_number": 3}]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_key_join_counts_duplicate_keys(comparator, write_csv, streaming):
+    header = ["id", "valor"]
+    file1 = write_csv("a.csv", [header, ["1", "10"], ["2", "20"], ["2", "21"], ["3", "30"]])
+    file2 = write_csv("b.csv", [header, ["3", "30"], ["2", "22"], ["4", "40"]])
+    
+    data = comparator.compare(file1, file2, key_columns=["id"], streaming=streaming)["data_result"]
+    
+    # Só a primeira ocorrência da chave repetida ("2", "20") é comparada
+    assert data["duplicate_keys_file1"] == 1
+    assert data["duplicate_keys_file2"] == 0
+    assert data["matched_records"] == 2
+    assert data["changed_records"] == 1
+    assert data["unique_in_file1"] == 1
+    assert data["unique_in_file2"] == 1
+    assert not data["are_identical"]
+    [field] = data["field_differences"]
+    assert (field["field_name"], field["differences_count"]) == ("valor", 1)
+
+
+def test_chunked_read_falls_back_to_latin1_after_the_sample(comparator, tmp_path):
+    comparator.SNIFF_BYTES = 64
+    comparator.CHUNK_ROWS = 10
+    lines = ["id;nome"] + [f"{i};nome{i}" for i in range(50)] + ["50;Jo\xe3o"]
+    path = tmp_path / "latin1.csv"
+    path.write_bytes("\n".join(lines).encode("latin1") + b"\n")
+    
+    config = comparator._detect_csv_config(str(path))
+    assert config["encoding"] == "utf-8"
+    
+    chunks = list(comparator._iter_csv_chunks(str(path), config))
+    
+    data = pd.concat(chunks)
+    assert list(data.index) == list(range(51))
+    assert data["nome"].iloc[-1] == "João"
+    assert comparator._detect_csv_config(str(path))["encoding"] == "latin1"
+
+
+def test_dialect_cache_is_invalidated_when_the_file_changes(comparator, write_csv, monkeypatch):
+    path = write_csv("dados.csv", [["id", "valor"], ["1", "10"]], sep=";")
+    assert comparator._detect_csv_config(str(path))["sep"] == ";"
+    
+    # Mesmo tamanho e data: o formato guardado é reaproveitado sem ler o arquivo
+    with monkeypatch.context() as patch:
+        patch.setattr("builtins.open", lambda *args, **kwargs: pytest.fail("arquivo lido de novo"))
+        assert comparator._detect_csv_config(str(path))["sep"] == ";"
+    
+    write_csv("dados.csv", [["id", "valor", "obs"], ["1", "10", "a"]], sep=",")
+    assert comparator._detect_csv_config(str(path))["sep"] == ","
+
+
+def test_sniffing_detects_quoting_and_bom(comparator, tmp_path):
+    path = tmp_path / "bom.csv"
+    path.write_bytes(b'\xef\xbb\xbf"id";"nome"\n"1";"a;b"\n')
+    
+    config = comparator._detect_csv_config(str(path))
+    
+    assert config["encoding"] == "utf-8-sig"
+    assert config["sep"] == ";"
+    df = comparator._read_csv_auto(str(path))
+    assert list(df.columns) == ["id", "nome"]
+    assert df["nome"].iloc[0] == "a;b"